@@ -1,10 +1,15 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, abort, make_response
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, EmailField, TextAreaField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError
 from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+import multiprocessing
+import threading
+import time
 import os
 import re
 
@@ -13,6 +18,16 @@ app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-producti
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['WTF_CSRF_ENABLED'] = False
+# 비밀번호 해시 비용/작업 프로세스 (값을 바꾸면 기존 사용자는 다음 로그인 때 새 설정으로 다시 저장됨)
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 16))
+app.config['PASSWORD_HASH_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+# 로그인/회원가입 시도 제한 (토큰 버킷: 한 번에 허용하는 횟수, 초당 채워지는 횟수)
+app.config['AUTH_IP_BURST'] = int(os.environ.get('AUTH_IP_BURST', 20))
+app.config['AUTH_IP_RATE'] = float(os.environ.get('AUTH_IP_RATE', 0.5))
+app.config['AUTH_ACCOUNT_BURST'] = int(os.environ.get('AUTH_ACCOUNT_BURST', 5))
+app.config['AUTH_ACCOUNT_RATE'] = float(os.environ.get('AUTH_ACCOUNT_RATE', 0.05))
 
 db = SQLAlchemy(app)
 
@@ -45,10 +60,10 @@ class User(db.Model):
     )
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
     
     def follow(self, user):
         if not self.is_following(user):
@@ -204,28 +219,226 @@ class TweetForm(FlaskForm):
         Length(max=300, message='트윗은 300자를 초과할 수 없습니다')
     ])
 
+# 비밀번호 해시 (별도 프로세스)
+# scrypt 는 일부러 느리게 만든 계산이라 요청 스레드에서 돌리면 로그인이 몰릴 때 타임라인 요청까지 밀림
+# → 작은 프로세스 풀에서 계산하고, 기다리는 작업 수를 PASSWORD_HASH_QUEUE 개로 제한해서 넘치면 바로 거절
+class HashBusy(Exception):
+    pass
+
+class PasswordHasher:
+    def __init__(self, method, workers, queue, timeout):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._prefix = None
+        self._dummy = None
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # fork 대신 spawn — 요청 스레드와 DB 연결을 자식 프로세스로 복제하지 않음
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashBusy()
+        try:
+            future = self._executor().submit(func, *args)
+        except BrokenProcessPool:
+            with self._lock:
+                self._pool = None
+            self._slots.release()
+            raise HashBusy()
+        # 시간 초과로 먼저 돌아가도 계산이 끝날 때까지는 자리를 차지함
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(self.timeout)
+        except (FutureTimeout, BrokenProcessPool):
+            raise HashBusy()
+
+    def hash(self, password):
+        pwhash = self._run(generate_password_hash, password, self.method)
+        self._prefix = pwhash.split('$', 1)[0]
+        return pwhash
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def verify_dummy(self, password):
+        # 없는 아이디도 같은 설정으로 한 번 계산 — 응답 시간으로 아이디가 있는지 알 수 없게
+        if self._dummy is None:
+            self._dummy = self.hash(os.urandom(16).hex())
+        self.verify(self._dummy, password)
+        return False
+
+    def needs_rehash(self, pwhash):
+        # 'pbkdf2:sha256' 처럼 생략된 설정도 실제 저장 형식('pbkdf2:sha256:600000')으로 비교
+        if self._prefix is None:
+            self.hash('')
+        return pwhash.split('$', 1)[0] != self._prefix
+
+password_hasher = PasswordHasher(
+    app.config['PASSWORD_HASH_METHOD'],
+    app.config['PASSWORD_HASH_WORKERS'],
+    app.config['PASSWORD_HASH_QUEUE'],
+    app.config['PASSWORD_HASH_TIMEOUT'],
+)
+
+# 로그인 시도 제한 (토큰 버킷)
+# 크리덴셜 스터핑처럼 한 IP/한 계정으로 몰리는 시도는 해시를 계산하기 전에 잘라냄
+class TokenBucket:
+    def __init__(self, burst, rate, max_keys=10000):
+        self.burst = burst
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = {}   # key → (남은 토큰, 마지막 갱신 시각)
+        self._lock = threading.Lock()
+
+    def _tokens(self, key, now):
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - last) * self.rate)
+
+    def peek(self, key):
+        # 토큰을 쓰지 않고 남아 있는지만
+        with self._lock:
+            return self._tokens(key, time.monotonic()) >= 1
+
+    def take(self, key):
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._tokens(key, now)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return allowed
+
+    def _prune(self, now):
+        # 다시 가득 찬 버킷은 없는 것과 같으므로 지우고, 그래도 많으면 오래된 것부터
+        refill = self.burst / self.rate if self.rate > 0 else float('inf')
+        for key, (tokens, last) in list(self._buckets.items()):
+            if now - last >= refill:
+                del self._buckets[key]
+        if len(self._buckets) > self.max_keys:
+            oldest = sorted(self._buckets, key=lambda k: self._buckets[k][1])
+            for key in oldest[:len(self._buckets) - self.max_keys]:
+                del self._buckets[key]
+
+ip_attempts = TokenBucket(app.config['AUTH_IP_BURST'], app.config['AUTH_IP_RATE'])
+account_attempts = TokenBucket(app.config['AUTH_ACCOUNT_BURST'], app.config['AUTH_ACCOUNT_RATE'])
+
+# 계정 버킷은 (계정, IP) 별로, 비밀번호가 틀렸을 때만 줄어듦
+# → 다른 곳에서 틀린 비밀번호를 반복해도 본인이 자기 IP에서 로그인하는 것은 막히지 않음
+def account_key(username):
+    return (username.lower(), request.remote_addr or '-')
+
+def password_attempt_allowed(username=None):
+    if not ip_attempts.take(request.remote_addr or '-'):
+        return False
+    return username is None or account_attempts.peek(account_key(username))
+
+def password_attempt_failed(username):
+    account_attempts.take(account_key(username))
+
+# 현재 로그인 사용자 (요청마다 한 번만)
+# 로그인할 때 바뀌지 않는 프로필 필드를 세션(서명된 쿠키)에 넣어 두고,
+# before_request 에서 g.user 로 만들어 둔다 — 누가 요청했는지 확인하는 데 DB 쿼리가 필요 없음
+# (이름처럼 수정할 수 있는 필드는 넣지 않음 — 다시 로그인할 때까지 예전 값이 보이므로 User 에서 읽음)
+SESSION_PROFILE_FIELDS = ('id', 'username')
+
+def remember_login(user):
+    session['user_id'] = user.id
+    session['username'] = user.username
+    session['profile'] = {field: getattr(user, field) for field in SESSION_PROFILE_FIELDS}
+    return session['profile']
+
+class CurrentUser:
+    def __init__(self, profile):
+        self.id = profile['id']
+        self.username = profile['username']
+        self._model = None
+        self._counts = {}
+
+    @property
+    def model(self):
+        # 팔로우/타임라인처럼 관계가 필요할 때만 User 를 한 번 불러옴
+        if self._model is None:
+            self._model = User.query.get(self.id)
+            if self._model is None:
+                # 로그인한 뒤 계정이 삭제됨 — 세션을 지우고 로그인하지 않은 요청과 똑같이 응답
+                session.clear()
+                g.user = None
+                if request.path.startswith('/api/'):
+                    abort(make_response(jsonify({'error': 'Unauthorized'}), 401))
+                flash('로그인이 필요합니다.', 'error')
+                abort(redirect(url_for('login')))
+        return self._model
+
+    def __getattr__(self, name):
+        # 세션에 없는 필드/메서드(tweets, followers, get_timeline ...)는 User 로 넘김
+        return getattr(self.model, name)
+
+    def _count(self, key, query):
+        # 사이드바가 같은 개수를 여러 번 물어도 요청당 한 번만 조회
+        if key not in self._counts:
+            self._counts[key] = query.count()
+        return self._counts[key]
+
+    def unread_notifications_count(self):
+        return self._count('notifications', Notification.query.filter_by(user_id=self.id, is_read=False))
+
+    def unread_messages_count(self):
+        return self._count('messages', Message.query.filter_by(receiver_id=self.id, is_read=False))
+
+@app.before_request
+def load_current_user():
+    g.user = None
+    user_id = session.get('user_id')
+    if user_id is None:
+        return
+    profile = session.get('profile')
+    if not profile or profile.get('id') != user_id:
+        # 이 기능 이전에 로그인한 세션 — 한 번만 불러와서 세션에 채워 둠
+        user = User.query.get(user_id)
+        if user is None:
+            session.clear()
+            return
+        profile = remember_login(user)
+    g.user = CurrentUser(profile)
+
 # 라우트
 @app.route('/')
 def index():
-    if 'user_id' in session:
-        user = User.query.get(session['user_id'])
+    if g.user:
+        user = g.user
         return render_template('dashboard.html', user=user)
     return render_template('index.html')
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
-    if 'user_id' in session:
+    if g.user:
         return redirect(url_for('index'))
     
     form = RegisterForm()
     if form.validate_on_submit():
+        if not password_attempt_allowed():
+            flash('요청이 너무 많습니다. 잠시 후 다시 시도해주세요.', 'error')
+            return render_template('register.html', form=form), 429
         user = User(
             username=form.username.data,
             name=form.name.data,
             email=form.email.data,
             profile=form.profile.data
         )
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except HashBusy:
+            flash('요청이 많아 처리하지 못했습니다. 잠시 후 다시 시도해주세요.', 'error')
+            return render_template('register.html', form=form), 503
         db.session.add(user)
         db.session.commit()
         flash('회원가입이 완료되었습니다! 로그인해주세요.', 'success')
@@ -235,38 +448,56 @@ def register():
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
-    if 'user_id' in session:
+    if g.user:
         return redirect(url_for('index'))
     
     form = LoginForm()
     if form.validate_on_submit():
+        if not password_attempt_allowed(form.username.data):
+            flash('로그인 시도가 너무 많습니다. 잠시 후 다시 시도해주세요.', 'error')
+            return render_template('login.html', form=form), 429
         user = User.query.filter_by(username=form.username.data).first()
-        if user and user.check_password(form.password.data):
-            session['user_id'] = user.id
-            session['username'] = user.username
+        try:
+            if user is None:
+                valid = password_hasher.verify_dummy(form.password.data)
+            else:
+                valid = user.check_password(form.password.data)
+        except HashBusy:
+            flash('요청이 많아 처리하지 못했습니다. 잠시 후 다시 시도해주세요.', 'error')
+            return render_template('login.html', form=form), 503
+        if valid:
+            try:
+                if password_hasher.needs_rehash(user.password_hash):
+                    # 해시 설정이 바뀐 뒤 첫 로그인 — 비밀번호를 알고 있는 지금 새 설정으로 다시 저장
+                    user.set_password(form.password.data)
+                    db.session.commit()
+            except HashBusy:
+                pass   # 다음 로그인 때 다시
+            remember_login(user)
             flash(f'{user.username}님, 환영합니다!', 'success')
             return redirect(url_for('timeline'))
         else:
+            password_attempt_failed(form.username.data)
             flash('아이디 또는 비밀번호가 올바르지 않습니다.', 'error')
     
     return render_template('login.html', form=form)
 
 @app.route('/profile')
 def profile():
-    if 'user_id' not in session:
+    if g.user is None:
         flash('로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
+    user = g.user
     return render_template('profile.html', user=user)
 
 @app.route('/timeline')
 def timeline():
-    if 'user_id' not in session:
+    if g.user is None:
         flash('로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
+    user = g.user
     form = TweetForm()
     tweets = user.get_timeline().all()
     
@@ -274,22 +505,22 @@ def timeline():
 
 @app.route('/users')
 def users_list():
-    if 'user_id' not in session:
+    if g.user is None:
         flash('로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
-    current_user = User.query.get(session['user_id'])
+    current_user = g.user
     all_users = User.query.filter(User.id != current_user.id).all()
     
     return render_template('users.html', user=current_user, all_users=all_users)
 
 @app.route('/user/<username>')
 def user_profile(username):
-    if 'user_id' not in session:
+    if g.user is None:
         flash('로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
-    current_user = User.query.get(session['user_id'])
+    current_user = g.user
     profile_user = User.query.filter_by(username=username).first_or_404()
     tweets = Tweet.query.filter_by(user_id=profile_user.id).order_by(Tweet.created_at.desc()).all()
     
@@ -297,11 +528,11 @@ def user_profile(username):
 
 @app.route('/notifications')
 def notifications():
-    if 'user_id' not in session:
+    if g.user is None:
         flash('로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
+    user = g.user
     notifications = Notification.query.filter_by(user_id=user.id).order_by(Notification.created_at.desc()).all()
     
     # 모든 알림을 읽음으로 표시
@@ -313,11 +544,11 @@ def notifications():
 
 @app.route('/messages')
 def messages():
-    if 'user_id' not in session:
+    if g.user is None:
         flash('로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
+    user = g.user
     
     # 대화 목록 가져오기
     conversations = db.session.query(User).join(
@@ -332,11 +563,11 @@ def messages():
 
 @app.route('/messages/<int:user_id>')
 def message_thread(user_id):
-    if 'user_id' not in session:
+    if g.user is None:
         flash('로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
+    user = g.user
     other_user = User.query.get_or_404(user_id)
     
     # 두 사용자 간의 메시지 가져오기
@@ -357,11 +588,11 @@ def message_thread(user_id):
 
 @app.route('/bookmarks')
 def bookmarks():
-    if 'user_id' not in session:
+    if g.user is None:
         flash('로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
+    user = g.user
     bookmarks = Bookmark.query.filter_by(user_id=user.id).order_by(Bookmark.created_at.desc()).all()
     tweets = [Tweet.query.get(b.tweet_id) for b in bookmarks]
     
@@ -369,11 +600,11 @@ def bookmarks():
 
 @app.route('/explore')
 def explore():
-    if 'user_id' not in session:
+    if g.user is None:
         flash('로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
+    user = g.user
     # 모든 트윗을 최신순으로
     tweets = Tweet.query.order_by(Tweet.created_at.desc()).limit(50).all()
     
@@ -388,7 +619,7 @@ def logout():
 # API 엔드포인트
 @app.route('/api/tweet', methods=['POST'])
 def api_tweet():
-    if 'user_id' not in session:
+    if g.user is None:
         return jsonify({'error': 'Unauthorized'}), 401
     
     data = request.get_json()
@@ -400,7 +631,7 @@ def api_tweet():
     if len(content) > 300:
         return jsonify({'error': 'Tweet exceeds 300 characters'}), 400
     
-    tweet = Tweet(content=content, user_id=session['user_id'])
+    tweet = Tweet(content=content, user_id=g.user.id)
     db.session.add(tweet)
     db.session.commit()
     
@@ -415,10 +646,10 @@ def api_tweet():
 
 @app.route('/api/follow/<int:user_id>', methods=['POST'])
 def api_follow(user_id):
-    if 'user_id' not in session:
+    if g.user is None:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    current_user = User.query.get(session['user_id'])
+    current_user = g.user
     user_to_follow = User.query.get(user_id)
     
     if not user_to_follow:
@@ -443,10 +674,10 @@ def api_follow(user_id):
 
 @app.route('/api/unfollow/<int:user_id>', methods=['POST'])
 def api_unfollow(user_id):
-    if 'user_id' not in session:
+    if g.user is None:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    current_user = User.query.get(session['user_id'])
+    current_user = g.user
     user_to_unfollow = User.query.get(user_id)
     
     if not user_to_unfollow:
@@ -459,11 +690,11 @@ def api_unfollow(user_id):
 
 @app.route('/api/like/<int:tweet_id>', methods=['POST'])
 def api_like(tweet_id):
-    if 'user_id' not in session:
+    if g.user is None:
         return jsonify({'error': 'Unauthorized'}), 401
     
     tweet = Tweet.query.get_or_404(tweet_id)
-    user = User.query.get(session['user_id'])
+    user = g.user
     
     existing_like = Like.query.filter_by(user_id=user.id, tweet_id=tweet_id).first()
     
@@ -491,11 +722,11 @@ def api_like(tweet_id):
 
 @app.route('/api/retweet/<int:tweet_id>', methods=['POST'])
 def api_retweet(tweet_id):
-    if 'user_id' not in session:
+    if g.user is None:
         return jsonify({'error': 'Unauthorized'}), 401
     
     tweet = Tweet.query.get_or_404(tweet_id)
-    user = User.query.get(session['user_id'])
+    user = g.user
     
     existing_retweet = Retweet.query.filter_by(user_id=user.id, tweet_id=tweet_id).first()
     
@@ -523,11 +754,11 @@ def api_retweet(tweet_id):
 
 @app.route('/api/bookmark/<int:tweet_id>', methods=['POST'])
 def api_bookmark(tweet_id):
-    if 'user_id' not in session:
+    if g.user is None:
         return jsonify({'error': 'Unauthorized'}), 401
     
     tweet = Tweet.query.get_or_404(tweet_id)
-    user = User.query.get(session['user_id'])
+    user = g.user
     
     existing_bookmark = Bookmark.query.filter_by(user_id=user.id, tweet_id=tweet_id).first()
     
@@ -543,7 +774,7 @@ def api_bookmark(tweet_id):
 
 @app.route('/api/reply/<int:tweet_id>', methods=['POST'])
 def api_reply(tweet_id):
-    if 'user_id' not in session:
+    if g.user is None:
         return jsonify({'error': 'Unauthorized'}), 401
     
     data = request.get_json()
@@ -556,7 +787,7 @@ def api_reply(tweet_id):
         return jsonify({'error': 'Reply exceeds 300 characters'}), 400
     
     tweet = Tweet.query.get_or_404(tweet_id)
-    user = User.query.get(session['user_id'])
+    user = g.user
     
     reply = Reply(content=content, user_id=user.id, tweet_id=tweet_id)
     db.session.add(reply)
@@ -577,7 +808,7 @@ def api_reply(tweet_id):
 
 @app.route('/api/send_message/<int:user_id>', methods=['POST'])
 def api_send_message(user_id):
-    if 'user_id' not in session:
+    if g.user is None:
         return jsonify({'error': 'Unauthorized'}), 401
     
     data = request.get_json()
@@ -587,7 +818,7 @@ def api_send_message(user_id):
         return jsonify({'error': 'Content is required'}), 400
     
     receiver = User.query.get_or_404(user_id)
-    sender = User.query.get(session['user_id'])
+    sender = g.user
     
     message = Message(content=content, sender_id=sender.id, receiver_id=receiver.id)
     db.session.add(message)
@@ -597,10 +828,10 @@ def api_send_message(user_id):
 
 @app.route('/api/timeline', methods=['GET'])
 def api_timeline():
-    if 'user_id' not in session:
+    if g.user is None:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    user = User.query.get(session['user_id'])
+    user = g.user
     tweets = user.get_timeline().all()
     
     return jsonify({
@@ -1,20 +1,315 @@
+import os
+import io
+import sys
+import csv
+import json
+import zlib
+import argparse
+import queue
 import pymysql
 import time
+import atexit
 import threading
-from flask import Flask, render_template, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
+
+try:
+    from sensor_archive import SensorArchive, day_range   # numpy 필요
+except ImportError:
+    SensorArchive = None
 
 app = Flask(__name__)
 
+# ── 설정 (환경변수 또는 sensor_config.py 로 덮어쓰기) ──
+app.config.from_mapping(
+    DB_HOST     = os.environ.get("SENSOR_DB_HOST", "localhost"),
+    DB_PORT     = int(os.environ.get("SENSOR_DB_PORT", 3306)),
+    DB_USER     = os.environ.get("SENSOR_DB_USER", "sensor_user"),
+    DB_PASSWORD = os.environ.get("SENSOR_DB_PASSWORD", "1234"),
+    DB_NAME     = os.environ.get("SENSOR_DB_NAME", "sensor_db"),
+    DB_POOL_SIZE          = int(os.environ.get("SENSOR_DB_POOL_SIZE", 5)),
+    DB_POOL_TIMEOUT       = float(os.environ.get("SENSOR_DB_POOL_TIMEOUT", 10)),    # 빈 연결 대기 시간(초)
+    DB_POOL_MAX_LIFETIME  = float(os.environ.get("SENSOR_DB_POOL_MAX_LIFETIME", 3600)),  # 연결 최대 수명(초)
+    DB_POOL_PING_INTERVAL = float(os.environ.get("SENSOR_DB_POOL_PING_INTERVAL", 30)),   # 이만큼 놀았으면 ping 확인
+    RAW_RETENTION_DAYS    = int(os.environ.get("SENSOR_RAW_RETENTION_DAYS", 7)),     # 원본 데이터 보관 기간
+    RETENTION_INTERVAL    = int(os.environ.get("SENSOR_RETENTION_INTERVAL", 600)),   # 정리 주기(초)
+    RETENTION_BATCH       = int(os.environ.get("SENSOR_RETENTION_BATCH", 5000)),     # DELETE 한 번에 지울 최대 행 수
+    ROLLUP_RETENTION_DAYS = int(os.environ.get("SENSOR_ROLLUP_RETENTION_DAYS", 365)), # 1시간/1일 롤업 보관 기간
+    COLLECT_INTERVAL      = float(os.environ.get("SENSOR_COLLECT_INTERVAL", 10)),    # 센서 수집 주기(초)
+    SCHEDULER_WORKERS     = int(os.environ.get("SENSOR_SCHEDULER_WORKERS", 4)),     # 작업 실행 스레드 수
+    ARCHIVE_DIR           = os.environ.get("SENSOR_ARCHIVE_DIR",
+                                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")),
+    ARCHIVE_INTERVAL      = int(os.environ.get("SENSOR_ARCHIVE_INTERVAL", 3600)),   # 보관 작업 주기(초)
+)
+app.config.from_pyfile("sensor_config.py", silent=True)
+
 # ── DB 연결 ──────────────────────────────────
 def get_connection():
     return pymysql.connect(
-        host="localhost",
-        user="sensor_user",
-        password="1234",
-        database="sensor_db",
+        host=app.config["DB_HOST"],
+        port=app.config["DB_PORT"],
+        user=app.config["DB_USER"],
+        password=app.config["DB_PASSWORD"],
+        database=app.config["DB_NAME"],
         charset="utf8mb4"
     )
 
+# ── 커넥션 풀 (라우트 + 수집 스레드 공용) ─────
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    def __init__(self, connect, size=5, timeout=10, max_lifetime=3600, ping_interval=30):
+        self._connect      = connect
+        self.timeout       = timeout
+        self.max_lifetime  = max_lifetime
+        self.ping_interval = ping_interval
+        self._idle  = queue.LifoQueue()                # (conn, 생성 시각, 마지막 사용 시각)
+        self._slots = threading.BoundedSemaphore(size)  # 동시에 빌려줄 수 있는 최대 개수
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(get_connection,
+                   size=config["DB_POOL_SIZE"],
+                   timeout=config["DB_POOL_TIMEOUT"],
+                   max_lifetime=config["DB_POOL_MAX_LIFETIME"],
+                   ping_interval=config["DB_POOL_PING_INTERVAL"])
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"{self.timeout}초 안에 DB 연결을 얻지 못했습니다")
+        try:
+            conn, created = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        try:
+            yield conn
+        finally:
+            self._checkin(conn, created)
+            self._slots.release()
+
+    def _checkout(self):
+        now = time.monotonic()
+        while True:
+            try:
+                conn, created, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(), now
+            if now - created > self.max_lifetime:
+                self._discard(conn)
+                continue
+            if now - last_used > self.ping_interval:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    self._discard(conn)
+                    continue
+            return conn, created
+
+    def _checkin(self, conn, created):
+        # autocommit=False 라 읽기만 해도 트랜잭션(REPEATABLE READ 스냅샷)이 열려 있음
+        # → 돌려받을 때마다 끝내야 다음 사용자가 예전 스냅샷을 보지 않음 (commit 한 뒤면 아무 일도 안 함)
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        self._idle.put((conn, created, time.monotonic()))
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                conn, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+db_pool = ConnectionPool.from_config(app.config)
+
+# ── 테이블/인덱스 준비 ───────────────────────
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS sensor_data (
+        id          INT AUTO_INCREMENT PRIMARY KEY,
+        temperature FLOAT NOT NULL,
+        humidity    FLOAT NOT NULL,
+        measured_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # 보관 기간 정리와 범위 조회가 measured_at 범위 스캔으로 끝나도록
+    "CREATE INDEX IF NOT EXISTS idx_sensor_data_measured_at ON sensor_data (measured_at)",
+    """
+    CREATE TABLE IF NOT EXISTS sensor_alerts (
+        id         INT AUTO_INCREMENT PRIMARY KEY,
+        device_id  VARCHAR(64) NOT NULL,
+        rule       VARCHAR(64) NOT NULL,
+        state      VARCHAR(16) NOT NULL,
+        value      FLOAT       NOT NULL,
+        message    VARCHAR(255) NOT NULL,
+        created_at DATETIME    NOT NULL,
+        INDEX idx_sensor_alerts_created_at (created_at)
+    )
+    """,
+]
+
+# 롤업 테이블 — 이름 → (버킷 자르기 함수, SQL 버킷 식, 보관 일수)
+ROLLUPS = {
+    "sensor_rollup_1m": (lambda t: t.replace(second=0, microsecond=0),
+                         "DATE_FORMAT(measured_at, '%Y-%m-%d %H:%i:00')", 30),
+    "sensor_rollup_1h": (lambda t: t.replace(minute=0, second=0, microsecond=0),
+                         "DATE_FORMAT(measured_at, '%Y-%m-%d %H:00:00')",
+                         app.config["ROLLUP_RETENTION_DAYS"]),
+    "sensor_rollup_1d": (lambda t: t.replace(hour=0, minute=0, second=0, microsecond=0),
+                         "DATE(measured_at)",
+                         app.config["ROLLUP_RETENTION_DAYS"]),
+}
+
+for _table in ROLLUPS:
+    SCHEMA.append(f"""
+    CREATE TABLE IF NOT EXISTS {_table} (
+        bucket   DATETIME PRIMARY KEY,
+        count    INT   NOT NULL,
+        temp_sum DOUBLE NOT NULL,
+        temp_min FLOAT NOT NULL,
+        temp_max FLOAT NOT NULL,
+        hum_sum  DOUBLE NOT NULL,
+        hum_min  FLOAT NOT NULL,
+        hum_max  FLOAT NOT NULL
+    )
+    """)
+
+def init_db():
+    with db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            for sql in SCHEMA:
+                cursor.execute(sql)
+            # 롤업이 비어 있으면 기존 원본 데이터로 한 번 채움
+            cursor.execute("SELECT COUNT(*) FROM sensor_rollup_1d")
+            empty = cursor.fetchone()[0] == 0
+        conn.commit()
+    if empty:
+        rebuild_rollups()
+
+# ── 작업 스케줄러 (수집/저장/정리 작업을 한 곳에서) ──
+# 다음 실행 시각을 "이전 예정 시각 + 주기"로 잡아서(monotonic 시계) 작업 시간만큼 밀리지 않음
+# 같은 작업이 아직 실행 중이면 이번 회차는 건너뜀 (겹쳐 실행하지 않음)
+class Job:
+    def __init__(self, name, func, interval):
+        self.name     = name
+        self.func     = func
+        self.interval = interval
+        self.next_run = time.monotonic()
+        self.running  = False
+        self.runs = self.failures = self.skipped = 0
+        self.last_duration = self.max_duration = self.total_duration = 0.0
+        self.last_error = None
+
+    def stats(self):
+        return {
+            "interval":      self.interval,
+            "running":       self.running,
+            "runs":          self.runs,
+            "failures":      self.failures,
+            "skipped":       self.skipped,
+            "last_duration": round(self.last_duration, 4),
+            "avg_duration":  round(self.total_duration / self.runs, 4) if self.runs else None,
+            "max_duration":  round(self.max_duration, 4),
+            "last_error":    self.last_error,
+        }
+
+class Scheduler:
+    def __init__(self, workers=4):
+        self._jobs    = {}
+        self._lock    = threading.Lock()
+        self._wakeup  = threading.Event()
+        self._pool    = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._thread  = None
+
+    def add_job(self, name, func, interval, delay=0):
+        job = Job(name, func, interval)
+        job.next_run += delay
+        with self._lock:
+            self._jobs[name] = job
+        self._wakeup.set()
+        return job
+
+    def trigger(self, name):
+        # 다음 주기를 기다리지 않고 바로 한 번 실행 (예: 버퍼가 가득 찼을 때)
+        with self._lock:
+            job = self._jobs.get(name)
+            if job is not None:
+                self._submit(job)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _submit(self, job):
+        # self._lock 을 잡고 호출
+        if job.running:
+            job.skipped += 1
+            return
+        job.running = True
+        self._pool.submit(self._execute, job)
+
+    def _execute(self, job):
+        started = time.perf_counter()
+        error   = None
+        try:
+            job.func()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"[{job.name}] 작업 오류:", e)
+        duration = time.perf_counter() - started
+        with self._lock:
+            job.running = False
+            job.runs += 1
+            job.last_duration   = duration
+            job.total_duration += duration
+            job.max_duration    = max(job.max_duration, duration)
+            if error:
+                job.failures  += 1
+                job.last_error = error
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                for job in self._jobs.values():
+                    if job.next_run > now:
+                        continue
+                    self._submit(job)
+                    job.next_run += job.interval
+                    if job.next_run <= now:
+                        # 너무 밀렸으면 놓친 회차는 건너뛰고 다음 예정 시각에 맞춤
+                        missed = int((now - job.next_run) // job.interval) + 1
+                        job.skipped  += missed
+                        job.next_run += missed * job.interval
+                wait = min((j.next_run for j in self._jobs.values()), default=now + 1) - now
+            self._wakeup.wait(max(wait, 0))
+            self._wakeup.clear()
+
+    def stats(self):
+        with self._lock:
+            return {name: job.stats() for name, job in self._jobs.items()}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+scheduler = Scheduler(app.config["SCHEDULER_WORKERS"])
+
 # ── 센서 읽기 (테스트용 랜덤 데이터) ──────────
 def read_sensor():
     try:
@@ -27,80 +322,460 @@ def read_sensor():
         print("센서 오류:", e)
         return None
 
-# ── 오래된 데이터 자동 삭제 (미션 4) ──────────
-MAX_RECORDS = 100
+# ── 오래된 데이터 자동 삭제 (보관 기간 기준) ──
+# 테이블 → (시각 컬럼, 보관 일수)
+RETENTION_POLICIES = {
+    "sensor_data": ("measured_at", app.config["RAW_RETENTION_DAYS"]),
+}
+for _table, (_, _, _days) in ROLLUPS.items():
+    RETENTION_POLICIES[_table] = ("bucket", _days)
+RETENTION_POLICIES["sensor_alerts"] = ("created_at", app.config["ROLLUP_RETENTION_DAYS"])
 
+def purge_table(table, column, days, batch=None, pause=0.05):
+    # 인덱스된 시각 범위로 batch 개씩 나눠 지워서 테이블 잠금을 짧게 유지
+    batch  = batch or app.config["RETENTION_BATCH"]
+    total  = 0
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT NOW() - INTERVAL %s DAY", (days,))
+        cutoff = cursor.fetchone()[0]
+        while True:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {column} < %s ORDER BY {column} LIMIT %s",
+                (cutoff, batch)
+            )
+            conn.commit()
+            total += cursor.rowcount
+            if cursor.rowcount < batch:
+                break
+            time.sleep(pause)  # 다른 쿼리가 끼어들 틈
+        cursor.close()
+    return total
+
+# 저장할 때마다 정리하지 않고 스케줄러가 RETENTION_INTERVAL 마다 실행
 def cleanup_old_records():
-    conn   = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM sensor_data")
-    count = cursor.fetchone()[0]
-    if count > MAX_RECORDS:
-        delete_count = count - MAX_RECORDS
-        cursor.execute(
-            "DELETE FROM sensor_data ORDER BY measured_at ASC LIMIT %s",
-            (delete_count,)
-        )
+    for table, (column, days) in RETENTION_POLICIES.items():
+        deleted = purge_table(table, column, days)
+        if deleted:
+            print(f"{table}: {days}일 지난 데이터 {deleted}개 삭제됨")
+
+# ── 롤업 (1분/1시간/1일 버킷 집계) ───────────
+# 같은 버킷에 다시 들어오면 count/sum은 더하고 min/max는 비교해서 갱신
+def _rollup_upsert_sql(table):
+    return f"""
+        INSERT INTO {table}
+            (bucket, count, temp_sum, temp_min, temp_max, hum_sum, hum_min, hum_max)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            count    = count    + VALUES(count),
+            temp_sum = temp_sum + VALUES(temp_sum),
+            temp_min = LEAST(temp_min, VALUES(temp_min)),
+            temp_max = GREATEST(temp_max, VALUES(temp_max)),
+            hum_sum  = hum_sum  + VALUES(hum_sum),
+            hum_min  = LEAST(hum_min, VALUES(hum_min)),
+            hum_max  = GREATEST(hum_max, VALUES(hum_max))
+    """
+
+def aggregate_rows(rows, truncate):
+    # (온도, 습도, 시각) 목록 → 버킷별 [count, t_sum, t_min, t_max, h_sum, h_min, h_max]
+    buckets = {}
+    for temp, hum, measured_at in rows:
+        key = truncate(measured_at)
+        b = buckets.get(key)
+        if b is None:
+            buckets[key] = [1, temp, temp, temp, hum, hum, hum]
+        else:
+            b[0] += 1
+            b[1] += temp
+            b[2] = min(b[2], temp)
+            b[3] = max(b[3], temp)
+            b[4] += hum
+            b[5] = min(b[5], hum)
+            b[6] = max(b[6], hum)
+    return [(key, *b) for key, b in buckets.items()]
+
+def update_rollups(cursor, rows):
+    # 배치 저장과 같은 트랜잭션에서 호출 — 원본과 롤업이 항상 같이 커밋됨
+    for table, (truncate, _, _) in ROLLUPS.items():
+        cursor.executemany(_rollup_upsert_sql(table), aggregate_rows(rows, truncate))
+
+def rebuild_rollups():
+    with db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            for table, (_, bucket_sql, _) in ROLLUPS.items():
+                cursor.execute(f"DELETE FROM {table}")
+                cursor.execute(f"""
+                    INSERT INTO {table}
+                        (bucket, count, temp_sum, temp_min, temp_max, hum_sum, hum_min, hum_max)
+                    SELECT {bucket_sql}, COUNT(*),
+                           SUM(temperature), MIN(temperature), MAX(temperature),
+                           SUM(humidity),    MIN(humidity),    MAX(humidity)
+                    FROM sensor_data
+                    GROUP BY 1
+                """)
         conn.commit()
-        print(f"{delete_count}개 삭제됨 (현재 {MAX_RECORDS}개 유지)")
-    cursor.close()
-    conn.close()
+
+# ── 과거 데이터 보관 (하루 단위 열 파일) ─────
+# 지난 날짜의 sensor_data 를 보관 기간이 끝나기 전에 날짜별 .npy 파일로 옮겨 둠
+# 장기 분석(/api/analysis)은 DB 대신 이 파일을 mmap 으로 읽음
+archive = SensorArchive(app.config["ARCHIVE_DIR"]) if SensorArchive else None
+
+ARCHIVE_GRACE = timedelta(minutes=10)   # 자정 직후 버퍼에 남은 전날 측정값을 기다림
+
+def archive_old_days():
+    if archive is None:
+        return 0
+    last_day = (datetime.now() - ARCHIVE_GRACE).date() - timedelta(days=1)
+    archived = 0
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT MIN(measured_at) FROM sensor_data")
+        first = cursor.fetchone()[0]
+        day = first.date() if first else last_day + timedelta(days=1)
+        while day <= last_day:
+            if not archive.has_day(day):
+                start, end = day_range(day)
+                cursor.execute("""
+                    SELECT measured_at, temperature, humidity FROM sensor_data
+                    WHERE measured_at >= %s AND measured_at < %s
+                    ORDER BY measured_at
+                """, (start, end))
+                rows = cursor.fetchall()
+                if rows:
+                    archived += archive.write_day(day, rows)
+                    print(f"{day} 데이터 {len(rows)}개 보관됨")
+            day += timedelta(days=1)
+        cursor.close()
+    return archived
+
+# ── 배치 저장 (버퍼 → multi-row INSERT) ─────
+BATCH_SIZE     = 50     # 이만큼 쌓이면 바로 flush
+FLUSH_INTERVAL = 5.0    # 아니면 이 주기(초)마다 flush
+MAX_BUFFER     = 10000  # DB 장애 시 메모리에 쌓아둘 최대 개수
+
+class SensorWriter:
+    # 측정값을 메모리에 모았다가 풀의 연결 하나로 한 번에 INSERT
+    SQL = ("INSERT INTO sensor_data (temperature, humidity, measured_at) "
+           "VALUES (%s, %s, %s)")
+    ALERT_SQL = ("INSERT INTO sensor_alerts (device_id, rule, state, value, message, created_at) "
+                 "VALUES (%s, %s, %s, %s, %s, %s)")
+
+    # 주기적인 flush는 스케줄러의 "flush" 작업이 FLUSH_INTERVAL 마다 실행
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size  = batch_size
+        self._buffer     = []
+        self._alerts     = []                 # 경보 이벤트도 같은 flush에서 저장
+        self._lock       = threading.Lock()   # 버퍼 보호
+        self._flush_lock = threading.Lock()   # 연결은 한 번에 한 스레드만 사용
+
+    def add(self, temperature, humidity, measured_at=None):
+        row = (temperature, humidity, measured_at or datetime.now())
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            scheduler.trigger("flush")
+
+    def add_alert(self, event):
+        row = (event["device_id"], event["rule"], event["state"],
+               event["value"], event["message"], event["at"])
+        with self._lock:
+            self._alerts.append(row)
+        scheduler.trigger("flush")   # 경보는 드물고 중요하므로 바로 저장
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+                alerts, self._alerts = self._alerts, []
+            if not rows and not alerts:
+                return 0
+            try:
+                with db_pool.connection() as conn:
+                    with conn.cursor() as cursor:
+                        if rows:
+                            # PyMySQL은 INSERT ... VALUES 의 executemany를 multi-row INSERT 한 문장으로 합침
+                            cursor.executemany(self.SQL, rows)
+                            update_rollups(cursor, rows)
+                        if alerts:
+                            cursor.executemany(self.ALERT_SQL, alerts)
+                    conn.commit()
+                if rows:
+                    summary_cache.invalidate()   # 대시보드가 새 측정값을 바로 보도록
+            except Exception:
+                # 실패한 묶음은 버퍼 앞에 되돌려 다음 flush에서 다시 시도
+                with self._lock:
+                    self._buffer[:0] = rows
+                    del self._buffer[:-MAX_BUFFER]
+                    self._alerts[:0] = alerts
+                raise
+            return len(rows)
+
+writer = SensorWriter()
+
+def _flush_on_exit():
+    try:
+        writer.flush()
+    except Exception as e:
+        print("종료 전 저장 실패:", e)
+    db_pool.close()
+
+atexit.register(_flush_on_exit)
+
+# ── 실시간 경보 엔진 (측정값이 들어올 때마다 평가) ──
+TEMP_LIMIT     = 30  # 미션 3 — 경보 기준 온도
+DEFAULT_DEVICE = "local"
+
+# 규칙마다 장치별 상태(dict)를 하나씩 갖고, 측정값 하나당 O(1)로 갱신
+# evaluate()는 경보 조건이면 True, 아니면 False, 아직 판단할 수 없으면 None
+# current()는 규칙이 실제로 비교한 값 (측정값, 분당 변화량, 이동 평균) — 메시지와 이벤트 value 에 사용
+class ThresholdRule:
+    # value >= high 이면 경보, high - hysteresis 아래로 내려가야 해제
+    def __init__(self, name, metric, high, hysteresis=1.0):
+        self.name, self.metric, self.high, self.hysteresis = name, metric, high, hysteresis
+
+    def evaluate(self, state, t, value, active):
+        limit = self.high - self.hysteresis if active else self.high
+        return value >= limit
+
+    def current(self, state, value):
+        return value
+
+    def describe(self, value):
+        return f"{self.metric} {value} (기준 {self.high})"
+
+class RateOfChangeRule:
+    # 직전 측정값 대비 분당 변화량이 per_minute 를 넘으면 경보
+    # 해제는 per_minute - hysteresis 아래로 내려가고, 마지막으로 넘은 뒤 hold 초가 지나야 (측정값마다 깜빡이지 않도록)
+    def __init__(self, name, metric, per_minute, hysteresis=2.0, hold=60):
+        self.name, self.metric, self.per_minute = name, metric, per_minute
+        self.hysteresis, self.hold = hysteresis, hold
+
+    def evaluate(self, state, t, value, active):
+        prev = state.get("prev")
+        state["prev"] = (t, value)
+        if prev is None or t <= prev[0]:
+            return None
+        rate = abs(value - prev[1]) / (t - prev[0]) * 60
+        state["rate"] = rate
+        if rate > self.per_minute:
+            state["last_over"] = t
+            return True
+        if not active:
+            return False
+        return rate > self.per_minute - self.hysteresis or t - state["last_over"] < self.hold
+
+    def current(self, state, value):
+        return round(state["rate"], 2)
+
+    def describe(self, value):
+        return f"{self.metric} 분당 변화량 (기준 {self.per_minute}, 현재 {value})"
+
+class MovingAverageRule:
+    # 최근 window 개 평균이 high 이상이면 경보 (합계를 들고 다녀서 O(1))
+    def __init__(self, name, metric, window, high, hysteresis=1.0):
+        self.name, self.metric, self.window = name, metric, window
+        self.high, self.hysteresis = high, hysteresis
+
+    def evaluate(self, state, t, value, active):
+        values = state.setdefault("values", deque())
+        values.append(value)
+        state["sum"] = state.get("sum", 0.0) + value
+        if len(values) > self.window:
+            state["sum"] -= values.popleft()
+        if len(values) < self.window:
+            return None
+        state["avg"] = state["sum"] / len(values)
+        limit = self.high - self.hysteresis if active else self.high
+        return state["avg"] >= limit
+
+    def current(self, state, value):
+        return round(state["avg"], 2)
+
+    def describe(self, value):
+        return f"{self.metric} 최근 {self.window}개 평균 (기준 {self.high}, 현재 {value})"
+
+# 장치 ID → 규칙 목록 ("*" 는 따로 지정하지 않은 장치 전부)
+ALERT_RULES = {
+    "*": [
+        ThresholdRule("temp_high", "temperature", TEMP_LIMIT, hysteresis=1.0),
+        RateOfChangeRule("temp_rate", "temperature", per_minute=5.0),
+        MovingAverageRule("humidity_avg_high", "humidity", window=30, high=75, hysteresis=3.0),
+    ],
+}
+
+class AlertEngine:
+    def __init__(self, rules):
+        self.rules   = rules
+        self.recent  = deque(maxlen=100)   # 최근 경보 이벤트
+        self._state  = {}                  # (장치, 규칙) → 규칙 상태
+        self._active = {}                  # (장치, 규칙) → 발생 이벤트
+        self._lock   = threading.Lock()
+        self._listeners = []               # SSE 구독자 큐
+
+    def evaluate(self, device_id, measured_at, reading):
+        t = measured_at.timestamp()
+        events = []
+        with self._lock:
+            for rule in self.rules.get(device_id, self.rules["*"]):
+                key    = (device_id, rule.name)
+                value  = reading[rule.metric]
+                active = key in self._active
+                state  = self._state.setdefault(key, {})
+                firing = rule.evaluate(state, t, value, active)
+                if firing is None or firing == active:
+                    continue
+                current = rule.current(state, value)
+                event = {
+                    "device_id": device_id,
+                    "rule":      rule.name,
+                    "state":     "raised" if firing else "cleared",
+                    "value":     current,
+                    "message":   rule.describe(current),
+                    "at":        measured_at,
+                }
+                if firing:
+                    self._active[key] = event
+                else:
+                    del self._active[key]
+                self.recent.append(event)
+                events.append(event)
+            listeners = list(self._listeners)
+        for event in events:
+            print(f"[경보 {event['state']}] {device_id} {event['message']}")
+            writer.add_alert(event)
+            for q in listeners:
+                try:
+                    q.put_nowait(event)
+                except queue.Full:
+                    pass
+        return events
+
+    def is_active(self, device_id, rule_name):
+        with self._lock:
+            return (device_id, rule_name) in self._active
+
+    def active(self):
+        with self._lock:
+            return list(self._active.values())
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=100)
+        with self._lock:
+            self._listeners.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._listeners.remove(q)
+
+alerts = AlertEngine(ALERT_RULES)
+
+def event_json(event):
+    return dict(event, at=event["at"].strftime("%Y-%m-%d %H:%M:%S"))
 
 # ── 데이터 저장 ──────────────────────────────
-def save_to_db(temperature, humidity):
-    conn   = get_connection()
-    cursor = conn.cursor()
-    sql    = "INSERT INTO sensor_data (temperature, humidity) VALUES (%s, %s)"
-    cursor.execute(sql, (temperature, humidity))
-    conn.commit()
-    cursor.close()
-    conn.close()
-    cleanup_old_records()  # 미션 4 — 저장 후 정리
-
-# ── 자동 수집 스레드 ─────────────────────────
-TEMP_LIMIT = 30  # 미션 3 — 경보 기준 온도
-
-def auto_collect(interval=10):
-    while True:
-        data = read_sensor()
-        if data:
-            save_to_db(data["temperature"], data["humidity"])
-            print(f"저장됨: {data['temperature']}°C, {data['humidity']}%")
-        time.sleep(interval)
+def save_to_db(temperature, humidity, device_id=DEFAULT_DEVICE):
+    measured_at = datetime.now()
+    writer.add(temperature, humidity, measured_at)
+    alerts.evaluate(device_id, measured_at, {"temperature": temperature, "humidity": humidity})
+
+# ── 자동 수집 ────────────────────────────────
+def collect_once():
+    data = read_sensor()
+    if data:
+        save_to_db(data["temperature"], data["humidity"])
+        print(f"수집됨: {data['temperature']}°C, {data['humidity']}%")
+
+def setup_jobs():
+    scheduler.add_job("collect",   collect_once,        app.config["COLLECT_INTERVAL"])
+    # 원본 INSERT + 롤업 갱신 (같은 트랜잭션)
+    scheduler.add_job("flush",     writer.flush,        FLUSH_INTERVAL, delay=FLUSH_INTERVAL)
+    scheduler.add_job("retention", cleanup_old_records, app.config["RETENTION_INTERVAL"], delay=60)
+    if archive is not None:
+        scheduler.add_job("archive", archive_old_days, app.config["ARCHIVE_INTERVAL"], delay=30)
+
+# ── 대시보드 요약 (최근 10개 + 통계, 짧게 캐시) ──
+# 쿼리 한 번으로 최근 측정값과 일 단위 롤업 통계를 같이 가져옴
+# 새로 저장되면(writer.flush) 캐시를 비우고, 아니면 SUMMARY_TTL 초 동안 재사용
+SUMMARY_TTL = 2.0
+
+class SummaryCache:
+    def __init__(self, ttl=SUMMARY_TTL):
+        self.ttl      = ttl
+        self._value   = None
+        self._expires = 0.0
+        self._version = 0   # 조회 도중 비워졌으면 오래된 결과를 캐시에 넣지 않도록
+        self._lock    = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._value    = None
+            self._version += 1
+
+    def get(self, load):
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires:
+                return self._value
+            version = self._version
+        value = load()
+        with self._lock:
+            if version == self._version:
+                self._value   = value
+                self._expires = time.monotonic() + self.ttl
+        return value
+
+summary_cache = SummaryCache()
+
+def load_summary():
+    with db_pool.connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        # 미션 1 — 통계 (AVG, MAX, MIN) — 일 단위 롤업에서 계산
+        cursor.execute("""
+            SELECT d.id, d.temperature, d.humidity, d.measured_at,
+                   s.avg_temp, s.max_temp, s.min_temp
+            FROM (SELECT * FROM sensor_data ORDER BY measured_at DESC LIMIT 10) AS d
+            CROSS JOIN (
+                SELECT
+                    SUM(temp_sum) / SUM(count) AS avg_temp,
+                    MAX(temp_max)              AS max_temp,
+                    MIN(temp_min)              AS min_temp
+                FROM sensor_rollup_1d
+            ) AS s
+            ORDER BY d.measured_at DESC
+        """)
+        rows = cursor.fetchall()
+        cursor.close()
+    stats = {k: rows[0][k] for k in ("avg_temp", "max_temp", "min_temp")} if rows else None
+    records = [
+        {"id": r["id"], "temperature": r["temperature"], "humidity": r["humidity"],
+         "measured_at": r["measured_at"].strftime("%Y-%m-%d %H:%M:%S")}
+        for r in rows
+    ]
+    return {"records": records, "stats": stats}
+
+def get_summary():
+    # 경보 상태는 메모리에 있으니 캐시하지 않고 매번 붙임
+    summary = dict(summary_cache.get(load_summary))
+    summary["alert"]         = alerts.is_active(DEFAULT_DEVICE, "temp_high")
+    summary["active_alerts"] = [event_json(e) for e in alerts.active()]
+    summary["limit"]         = TEMP_LIMIT
+    return summary
 
 # ── 메인 라우트 (미션 1, 2, 3 통합) ──────────
+# 처음 한 번만 서버에서 그리고, 이후에는 페이지가 /api/summary 를 주기적으로 받아 다시 그림
 @app.route('/')
 def index():
-    conn   = get_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-
-    # 최근 10개 조회
-    cursor.execute("SELECT * FROM sensor_data ORDER BY measured_at DESC LIMIT 10")
-    records = cursor.fetchall()
-
-    # 미션 1 — 통계 (AVG, MAX, MIN)
-    cursor.execute("""
-        SELECT
-            AVG(temperature) AS avg_temp,
-            MAX(temperature) AS max_temp,
-            MIN(temperature) AS min_temp
-        FROM sensor_data
-    """)
-    stats = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
-
-    # 미션 3 — 경보 확인
-    alert = False
-    if records and records[0]["temperature"] >= TEMP_LIMIT:
-        alert = True
+    # 미션 3 — 경보 확인 (수집할 때 이미 평가된 상태를 그대로 사용)
+    return render_template("index.html", **get_summary())
 
-    return render_template("index.html",
-                           records=records,
-                           stats=stats,
-                           alert=alert,
-                           limit=TEMP_LIMIT)
+@app.route('/api/summary')
+def summary():
+    return jsonify(get_summary())
 
 # ── 데이터 수집 라우트 ───────────────────────
 @app.route('/collect')
@@ -108,51 +783,282 @@ def collect():
     data = read_sensor()
     if data:
         save_to_db(data["temperature"], data["humidity"])
+        writer.flush()  # 수동 수집은 바로 화면에 보이도록 즉시 저장
         return f"저장 완료: 온도 {data['temperature']}°C, 습도 {data['humidity']}%"
     else:
         return "센서 데이터를 읽을 수 없습니다.", 500
 
+# ── 작업 상태 (실행 횟수, 소요 시간, 건너뛴 횟수) ──
+@app.route('/api/jobs')
+def job_stats():
+    return jsonify(scheduler.stats())
+
+# ── 경보 API ────────────────────────────────
+@app.route('/api/alerts')
+def alert_list():
+    return jsonify({
+        "active": [event_json(e) for e in alerts.active()],
+        "recent": [event_json(e) for e in list(alerts.recent)],
+    })
+
+# Server-Sent Events — 경보가 발생/해제되는 즉시 대시보드로 전달
+@app.route('/api/alerts/stream')
+def alert_stream():
+    def events():
+        q = alerts.subscribe()
+        try:
+            while True:
+                try:
+                    event = q.get(timeout=15)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(event_json(event), ensure_ascii=False)}\n\n"
+        finally:
+            alerts.unsubscribe(q)
+    return Response(stream_with_context(events()), mimetype="text/event-stream")
+
 # ── 미션 5 — Chart.js API 라우트 ─────────────
+# /api/chart?from=<epoch>&to=<epoch>&points=<개수>
+# 구간 길이에 맞는 원본/롤업 테이블을 골라 points 개 이하의 버킷(평균/최소/최대)으로 줄여서 반환
+CHART_DEFAULT_RANGE  = 3600   # from/to 없으면 최근 1시간
+CHART_DEFAULT_POINTS = 300
+CHART_MAX_POINTS     = 2000
+
+# (이름, 테이블, 버킷 초, 보관 일수, 평균/최소/최대 SQL) — 촘촘한 것부터
+CHART_TIERS = [
+    ("raw", "sensor_data", 1, app.config["RAW_RETENTION_DAYS"], "measured_at",
+     "AVG(temperature), MIN(temperature), MAX(temperature), "
+     "AVG(humidity), MIN(humidity), MAX(humidity)"),
+] + [
+    (table.rsplit("_", 1)[1], table, seconds, ROLLUPS[table][2], "bucket",
+     "SUM(temp_sum) / SUM(count), MIN(temp_min), MAX(temp_max), "
+     "SUM(hum_sum) / SUM(count), MIN(hum_min), MAX(hum_max)")
+    for table, seconds in (("sensor_rollup_1m", 60),
+                           ("sensor_rollup_1h", 3600),
+                           ("sensor_rollup_1d", 86400))
+]
+
+def choose_tier(start, end, points):
+    # 버킷 간격(step)보다 작거나 같은 가장 굵은 단위, 단 시작 시점이 보관 기간 안이어야 함
+    step   = max(1, -(-(end - start) // points))  # 올림 나눗셈
+    age    = time.time() - start
+    chosen = None
+    for tier in CHART_TIERS:
+        if tier[2] <= step and age <= tier[3] * 86400:
+            chosen = tier
+    if chosen is None:
+        # 오래된 구간은 남아 있는 가장 촘촘한 롤업 사용
+        chosen = next((t for t in CHART_TIERS if age <= t[3] * 86400), CHART_TIERS[-1])
+    return chosen, max(step, chosen[2])
+
 @app.route('/api/chart')
 def chart_data():
-    conn   = get_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    cursor.execute("""
-        SELECT temperature, humidity, measured_at
-        FROM sensor_data
-        ORDER BY measured_at ASC
-        LIMIT 20
-    """)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    try:
+        now    = int(time.time())
+        end    = int(float(request.args.get("to", now)))
+        start  = int(float(request.args.get("from", end - CHART_DEFAULT_RANGE)))
+        points = int(request.args.get("points", CHART_DEFAULT_POINTS))
+        # inf, 1e20 처럼 날짜로 바꿀 수 없는 값은 여기서 걸러냄
+        datetime.fromtimestamp(start)
+        datetime.fromtimestamp(end)
+    except (ValueError, OverflowError, OSError):
+        return jsonify({"error": "from/to/points는 숫자여야 합니다"}), 400
+    if start >= end:
+        return jsonify({"error": "from은 to보다 작아야 합니다"}), 400
+    points = max(2, min(points, CHART_MAX_POINTS))
 
-    labels = [str(row["measured_at"]) for row in rows]
-    temps  = [float(row["temperature"]) for row in rows]
-    hums   = [float(row["humidity"])    for row in rows]
+    (name, table, _, _, column, aggregates), step = choose_tier(start, end, points)
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT FLOOR(UNIX_TIMESTAMP({column}) / %s) * %s AS t, {aggregates}
+            FROM {table}
+            WHERE {column} >= FROM_UNIXTIME(%s) AND {column} < FROM_UNIXTIME(%s)
+            GROUP BY t
+            ORDER BY t ASC
+        """, (step, step, start, end))
+        rows = cursor.fetchall()
+        cursor.close()
 
-    return jsonify({"labels": labels, "temperatures": temps, "humidities": hums})
+    # 열(column) 단위 배열로 묶어서 전송 — 행마다 키 이름을 반복하지 않음
+    columns = list(zip(*rows)) or [()] * 7
+    return jsonify({
+        "tier": name,
+        "step": step,
+        "t":        [int(v) for v in columns[0]],
+        "temp_avg": [round(float(v), 2) for v in columns[1]],
+        "temp_min": [float(v) for v in columns[2]],
+        "temp_max": [float(v) for v in columns[3]],
+        "hum_avg":  [round(float(v), 2) for v in columns[4]],
+        "hum_min":  [float(v) for v in columns[5]],
+        "hum_max":  [float(v) for v in columns[6]],
+    })
 
 # ── 미션 6 — 시간대별 분석 라우트 ─────────────
 @app.route('/analysis')
 def analysis():
-    conn   = get_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    cursor.execute("""
-        SELECT
-            HOUR(measured_at) AS hour,
-            AVG(temperature)  AS avg_temp,
-            COUNT(*)          AS count
-        FROM sensor_data
-        GROUP BY HOUR(measured_at)
-        ORDER BY hour ASC
-    """)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        # 시간 단위 롤업을 시(hour)별로 다시 묶음
+        cursor.execute("""
+            SELECT
+                HOUR(bucket)               AS hour,
+                SUM(temp_sum) / SUM(count) AS avg_temp,
+                SUM(count)                 AS count
+            FROM sensor_rollup_1h
+            GROUP BY HOUR(bucket)
+            ORDER BY hour ASC
+        """)
+        rows = cursor.fetchall()
+        cursor.close()
     return render_template("analysis.html", hourly=rows)
 
-if __name__ == '__main__':
-    thread = threading.Thread(target=auto_collect, args=(10,), daemon=True)
-    thread.start()
+# /api/analysis?from=<epoch>&to=<epoch>
+# 보관 파일(지난 날짜)로 시간대별/일별 통계, 백분위, 온도-습도 상관계수 계산
+ANALYSIS_DEFAULT_DAYS = 30
+
+@app.route('/api/analysis')
+def archive_analysis():
+    if archive is None:
+        return jsonify({"error": "numpy가 설치되어 있지 않아 보관 데이터 분석을 사용할 수 없습니다"}), 503
+    try:
+        now   = time.time()
+        end   = float(request.args.get("to", now))
+        start = float(request.args.get("from", end - ANALYSIS_DEFAULT_DAYS * 86400))
+        start, end = datetime.fromtimestamp(start), datetime.fromtimestamp(end)
+    except (ValueError, OverflowError, OSError):
+        return jsonify({"error": "from/to는 숫자여야 합니다"}), 400
+    if start >= end:
+        return jsonify({"error": "from은 to보다 작아야 합니다"}), 400
+    return jsonify(archive.summary(start, end))
+
+# ── 데이터 내보내기 (CSV / NDJSON 스트리밍) ────
+# fetchall() 로 전부 메모리에 올리지 않고 서버 측 커서(SSCursor)에서 EXPORT_CHUNK 행씩 꺼내 바로 전송
+# 몇 달치를 내보내도 메모리 사용량이 일정하고 첫 바이트가 바로 나감
+EXPORT_CHUNK   = 1000
+EXPORT_FORMATS = {
+    "csv":    ("text/csv",             "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+EXPORT_COLUMNS = ("id", "measured_at", "temperature", "humidity")
+
+def parse_time(value, default=None):
+    # epoch 초 또는 ISO 형식("2026-10-01", "2026-10-01T12:00:00", "2026-10-01T00:00:00+09:00")
+    # measured_at 은 서버 현지 시각(naive)이므로 오프셋이 붙은 값은 현지 시각으로 바꿔서 비교
+    if value in (None, ""):
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+    try:
+        return datetime.fromtimestamp(seconds)
+    except (OverflowError, OSError) as e:   # inf, 1e20 처럼 날짜로 바꿀 수 없는 값
+        raise ValueError(f"범위를 벗어난 시각: {value}") from e
+
+def export_rows(start, end):
+    # SSCursor 는 결과를 다 읽을 때까지 연결을 점유하므로 풀이 아닌 전용 연결 사용
+    conn   = get_connection()
+    cursor = conn.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(f"""
+            SELECT {", ".join(EXPORT_COLUMNS)} FROM sensor_data
+            WHERE measured_at >= %s AND measured_at < %s
+            ORDER BY measured_at
+        """, (start, end))
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+        conn.close()
+
+def format_chunks(chunks, fmt):
+    if fmt == "csv":
+        buf     = io.StringIO()
+        csv_out = csv.writer(buf, lineterminator="\n")   # 모듈의 writer(SensorWriter)와 다른 이름으로
+        csv_out.writerow(EXPORT_COLUMNS)
+        for rows in chunks:
+            csv_out.writerows((r[0], r[1].isoformat(sep=" "), r[2], r[3]) for r in rows)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        yield buf.getvalue()   # 행이 없을 때 머리글
+    else:
+        for rows in chunks:
+            yield "".join(
+                json.dumps(dict(zip(EXPORT_COLUMNS, (r[0], r[1].isoformat(), r[2], r[3])))) + "\n"
+                for r in rows)
+
+def encode_chunks(pieces, compress=False):
+    if not compress:
+        for piece in pieces:
+            if piece:
+                yield piece.encode("utf-8")
+        return
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits=31 → gzip 헤더
+    for piece in pieces:
+        data = gz.compress(piece.encode("utf-8"))
+        if data:
+            yield data
+    yield gz.flush()
+
+# /export?from=&to=&format=csv|ndjson&gzip=1
+@app.route('/export')
+def export_data():
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": "format은 csv 또는 ndjson 이어야 합니다"}), 400
+    try:
+        end   = parse_time(request.args.get("to"), datetime.now())
+        start = parse_time(request.args.get("from"), datetime(1970, 1, 2))
+    except ValueError:
+        return jsonify({"error": "from/to는 epoch 초 또는 ISO 날짜여야 합니다"}), 400
+    if start >= end:
+        return jsonify({"error": "from은 to보다 작아야 합니다"}), 400
+
+    compress = request.args.get("gzip") in ("1", "true")
+    mimetype, ext = EXPORT_FORMATS[fmt]
+    filename = f"sensor_data_{start:%Y%m%d}_{end:%Y%m%d}.{ext}"
+    if compress:
+        mimetype, filename = "application/gzip", filename + ".gz"
+    body = encode_chunks(format_chunks(export_rows(start, end), fmt), compress)
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+# python3 flask_sensor_app.py export --from 2026-09-01 --to 2026-10-01 --format ndjson --gzip -o sep.ndjson.gz
+def export_cli(argv):
+    parser = argparse.ArgumentParser(prog="flask_sensor_app.py export",
+                                     description="sensor_data 를 CSV/NDJSON 으로 내보내기")
+    parser.add_argument("--from", dest="start", help="시작 (epoch 초 또는 ISO 날짜)")
+    parser.add_argument("--to",   dest="end",   help="끝 (기본: 지금)")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--gzip", action="store_true", help="gzip 으로 압축")
+    parser.add_argument("-o", "--output", help="저장할 파일 (기본: 표준 출력)")
+    args  = parser.parse_args(argv)
+    try:
+        end   = parse_time(args.end, datetime.now())
+        start = parse_time(args.start, datetime(1970, 1, 2))
+    except ValueError as e:
+        parser.error(f"--from/--to: {e}")
+    out   = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for data in encode_chunks(format_chunks(export_rows(start, end), args.format), args.gzip):
+            out.write(data)
+    finally:
+        if args.output:
+            out.close()
+
+if __name__ == '__main__' and sys.argv[1:2] == ["export"]:
+    export_cli(sys.argv[2:])
+elif __name__ == '__main__':
+    init_db()
+    setup_jobs()
+    scheduler.start()
     app.run(host="0.0.0.0", debug=True, use_reloader=False)
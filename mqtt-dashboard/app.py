@@ -1,46 +1,236 @@
 import paho.mqtt.client as mqtt
-from flask import Flask, render_template_string
+from flask import Flask, render_template_string, request, jsonify
 from flask_socketio import SocketIO
-from datetime import datetime
-from collections import deque
+from topic_router import TopicRouter
+from mqtt_publisher import Publisher
+from collections import OrderedDict
 import json
+import os
+import queue
+import sys
 import threading
+import time
+
+# 링 버퍼/Redis 공유 기록은 sensor-monitoring 과 함께 쓰는 저장소 최상위 sensor_common/ 에 있음
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sensor_common.ring_buffer import SensorRing
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'secret!'
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
-history = deque(maxlen=50)
-sensor_data = {"temperature": 0, "humidity": 0, "timestamp": ""}
+# 워커 프로세스를 여러 개 띄울 때 (sensor-monitoring README "여러 프로세스로 실행" 참고)
+# - emit 은 메시지 큐(Redis)를 거쳐 모든 워커의 브라우저에게 전달
+# - seq 번호와 최근 기록은 SHARED_HISTORY_URL(기본: 메시지 큐와 같은 Redis)에 공유
+# - MQTT 는 공유 구독($share/<그룹>/...)으로 받아서 메시지 하나를 워커 하나만 처리
+MESSAGE_QUEUE      = os.environ.get("SOCKETIO_MESSAGE_QUEUE")           # 예: redis://localhost:6379/0
+SHARED_HISTORY_URL = os.environ.get("SHARED_HISTORY_URL", MESSAGE_QUEUE)
+SHARED_CAPACITY    = int(os.environ.get("SHARED_HISTORY_CAPACITY", 3600))  # Redis에 두는 대시보드 기록 개수
+MQTT_SHARED_GROUP  = os.environ.get("MQTT_SHARED_GROUP", "dashboard")
+PORT               = int(os.environ.get("PORT", 5000))
+
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading',
+                    message_queue=MESSAGE_QUEUE)
+
+HISTORY_SIZE     = 50      # 브라우저에 보여주는 개수
+HISTORY_CAPACITY = int(os.environ.get("HISTORY_CAPACITY", 86400))  # 메모리에 들고 있는 개수 (1초 간격 24시간)
+history = SensorRing(HISTORY_CAPACITY)   # 측정값마다 seq 번호 — 브라우저가 빠진 부분만 다시 받는 데 사용
+state_lock = threading.Lock()
+
+BROKER_HOST = os.environ.get("MQTT_BROKER_HOST", "broker.emqx.io")
+BROKER_PORT = int(os.environ.get("MQTT_BROKER_PORT", 1883))
+TOPIC       = "python/mqtt"          # 온도/습도 JSON 한 번에 (대시보드 화면용)
+METRIC_TOPIC = "sensors/+/+"         # sensors/<장치>/<항목> — 값 하나씩
+SUBSCRIPTIONS = [TOPIC, METRIC_TOPIC]
+TOPIC_CAPACITY = int(os.environ.get("TOPIC_CAPACITY", 3600))  # 토픽마다 메모리에 들고 있는 개수
+MAX_TOPICS     = int(os.environ.get("MAX_TOPICS", 1000))      # 기록하는 토픽 최대 개수 (공개 브로커에서는 누구나 발행 가능)
+EMIT_RATE   = float(os.environ.get("EMIT_RATE", 5))   # 초당 최대 브라우저 전송 횟수
+INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", 10000))  # 처리 대기 메시지 최대 개수
+INGEST_WORKERS    = int(os.environ.get("INGEST_WORKERS", 2))
+INGEST_DROP       = os.environ.get("INGEST_DROP", "oldest")          # 큐가 가득 차면 oldest/newest 중 버릴 쪽
+
+if SHARED_HISTORY_URL:
+    from sensor_common.shared_history import SharedHistory   # redis 패키지 필요
+    shared        = SharedHistory(SHARED_HISTORY_URL, "mqtt", SHARED_CAPACITY)
+    shared_topics = SharedHistory(SHARED_HISTORY_URL, "mqtt-topic", TOPIC_CAPACITY, columns=("value",))
+else:
+    shared = shared_topics = None
+SHARED_KEY = "dashboard"   # shared 안에서 대시보드 기록의 key
+
+def subscription(topic):
+    return f"$share/{MQTT_SHARED_GROUP}/{topic}" if shared else topic
+
+# ── 전송 묶기 (수신 속도와 상관없이 초당 EMIT_RATE 번) ──
+class Broadcaster:
+    def __init__(self, rate=EMIT_RATE):
+        self.interval = 1.0 / rate
+        self._pending = []             # 아직 안 보낸 측정값들
+        self._lock    = threading.Lock()
+        self._started = False
+
+    def push(self, point):
+        with self._lock:
+            self._pending.append(point)
+            # 브라우저도 HISTORY_SIZE 개만 들고 있으므로 그 이상은 버림 (seq가 끊기면 스냅샷으로 맞춤)
+            del self._pending[:-HISTORY_SIZE]
+
+    def start(self):
+        if not self._started:
+            self._started = True
+            socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.interval)
+            with self._lock:
+                points, self._pending = self._pending, []
+            if points:
+                socketio.emit('sensor_update', {"points": points})
 
-BROKER_HOST = "broker.emqx.io"
-BROKER_PORT = 1883
-TOPIC       = "python/mqtt"
+broadcaster = Broadcaster()
 
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
         print("✅ MQTT 브로커 연결 완료!")
-        client.subscribe(TOPIC, qos=1)
+        client.subscribe([(subscription(topic), 1) for topic in SUBSCRIPTIONS])
     else:
         print(f"❌ 연결 실패: {rc}")
 
 def on_message(client, userdata, msg):
-    global sensor_data
+    # paho 네트워크 스레드에서는 큐에 넣기만 하고 바로 반환 (QoS 1 ack가 밀리지 않도록)
+    pipeline.submit(msg.topic, msg.payload)
+
+# ── 토픽별 처리 ──────────────────────────────
+router = TopicRouter()
+
+# 토픽 → 그 토픽 값 기록 (sensors/<장치>/<항목> 하나당 링 버퍼 하나)
+# MAX_TOPICS 개를 넘으면 가장 오래 값이 안 들어온 토픽부터 지움 (최근 갱신 순서 = OrderedDict 순서)
+topics = OrderedDict()
+topics_lock = threading.Lock()
+
+def topic_ring(topic):
+    # topics_lock 을 잡은 상태에서 호출
+    ring = topics.get(topic)
+    if ring is None:
+        ring = topics[topic] = SensorRing(TOPIC_CAPACITY, columns=("value",))
+        while len(topics) > MAX_TOPICS:
+            topics.popitem(last=False)
+    else:
+        topics.move_to_end(topic)
+    return ring
+
+def handle_message(topic, raw):
+    if not router.dispatch(topic, raw):
+        raise ValueError(f"처리할 핸들러가 없는 토픽: {topic}")
+
+@router.route(METRIC_TOPIC)
+def handle_metric(topic, raw, device_id, metric):
+    # 값은 숫자 그대로("23.5") 또는 {"value": 23.5}
+    text = raw.decode()
     try:
-        payload = json.loads(msg.payload.decode())
-        sensor_data = {
-            "temperature": payload.get("temperature", 0),
-            "humidity":    payload.get("humidity", 0),
-            "timestamp":   datetime.now().strftime("%H:%M:%S")
-        }
-        history.append(dict(sensor_data))
-        print(f"[수신] {msg.topic} | {sensor_data}")
-        socketio.emit('sensor_update', {
-            "current": sensor_data,
-            "history": list(history)
-        })
-    except Exception as e:
-        print(f"파싱 오류: {e}")
+        value = float(text)
+    except ValueError:
+        value = float(json.loads(text)["value"])
+    if shared_topics:
+        # Redis 쪽은 갱신 순서를 따로 두지 않으므로 MAX_TOPICS 가 차면 새 토픽을 받지 않음
+        if shared_topics.key_count() >= MAX_TOPICS and not shared_topics.has_key(topic):
+            raise ValueError(f"토픽이 {MAX_TOPICS}개를 넘어 무시: {topic}")
+        shared_topics.append(topic, time.time(), value)
+        return
+    with topics_lock:
+        topic_ring(topic).append(time.time(), value)
+
+@router.route(TOPIC)
+def handle_dashboard(topic, raw):
+    payload = json.loads(raw.decode())
+    temperature = float(payload.get("temperature", 0))
+    humidity    = float(payload.get("humidity", 0))
+    t = time.time()
+    with state_lock:
+        if shared:
+            point = shared.append(SHARED_KEY, t, temperature, humidity)
+        else:
+            seq = history.append(t, temperature, humidity)
+            point = {"seq": seq, "t": t, "temperature": temperature, "humidity": humidity}
+        if "sent_at" in payload:
+            point["sent_at"] = payload["sent_at"]   # 벤치마크용 발행 시각 (지연 측정)
+        # seq 순서대로 쌓이도록 잠금 안에서 넘김 — 실제 전송은 broadcaster가 모아서
+        broadcaster.push(point)
+    print(f"[수신] {topic} | {point}")
+
+# ── 수신 파이프라인 (MQTT 콜백 → 제한된 큐 → 워커) ──
+class IngestPipeline:
+    def __init__(self, handler, maxsize=INGEST_QUEUE_SIZE, workers=INGEST_WORKERS, drop=INGEST_DROP):
+        self.handler = handler
+        self.workers = workers
+        self.drop    = drop
+        self._queue  = queue.Queue(maxsize=maxsize)
+        self._lock   = threading.Lock()
+        self.received = self.processed = self.dropped = self.errors = 0
+        self._started = False
+
+    def submit(self, topic, raw):
+        with self._lock:
+            self.received += 1
+        try:
+            self._queue.put_nowait((topic, raw))
+            return
+        except queue.Full:
+            pass
+        # 가득 찼을 때: oldest면 가장 오래된 것을 버리고 새 것을 넣음, newest면 새 것을 버림
+        if self.drop == "oldest":
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait((topic, raw))
+            except queue.Full:
+                pass
+        with self._lock:
+            self.dropped += 1
+
+    def start(self):
+        if not self._started:
+            self._started = True
+            for _ in range(self.workers):
+                threading.Thread(target=self._work, daemon=True).start()
+
+    def _work(self):
+        while True:
+            topic, raw = self._queue.get()
+            try:
+                self.handler(topic, raw)
+                with self._lock:
+                    self.processed += 1
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"파싱 오류: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_max":   self._queue.maxsize,
+                "received":    self.received,
+                "processed":   self.processed,
+                "dropped":     self.dropped,
+                "errors":      self.errors,
+                "drop_policy": self.drop,
+            }
+
+pipeline = IngestPipeline(handle_message)
+
+def snapshot(since=None):
+    # since 이후가 버퍼에 남아 있고 화면 개수 이내면 그 부분만, 아니면 최근 HISTORY_SIZE 개를 reset으로
+    if shared:
+        return shared.snapshot(SHARED_KEY, since, HISTORY_SIZE)
+    with state_lock:
+        last = history.last_seq
+        if since is not None and len(history) and history.first_seq - 1 <= since <= last \
+                and last - since <= HISTORY_SIZE:
+            return {"seq": last, "reset": False, "history": history.points(last - since)}
+        return {"seq": last, "reset": True, "history": history.points(HISTORY_SIZE)}
 
 def start_mqtt():
     client = mqtt.Client()
@@ -49,25 +239,75 @@ def start_mqtt():
     client.connect(BROKER_HOST, BROKER_PORT, 60)
     client.loop_forever()
 
+pipeline.start()
 threading.Thread(target=start_mqtt, daemon=True).start()
+broadcaster.start()
+
+# /test 발행용 — 요청마다 새로 접속하지 않고 연결 하나를 계속 사용
+publisher = Publisher(BROKER_HOST, BROKER_PORT).start()
 
 @socketio.on('connect')
 def on_browser_connect():
     print("🌐 브라우저 연결됨")
 
+@socketio.on('sync')
+def on_sync(msg):
+    # 접속/재접속한 브라우저에게만 스냅샷 전송
+    socketio.emit('sensor_snapshot', snapshot((msg or {}).get("last_seq")), to=request.sid)
+
 @app.route('/')
 def index():
-    return render_template_string(HTML_PAGE)
+    return render_template_string(HTML_PAGE, broker=BROKER_HOST)
+
+# 최근 window 개(기본 전체) 평균/최소/최대/표준편차
+@app.route('/api/stats')
+def stats():
+    window = request.args.get("window", type=int)
+    if window is not None:
+        window = max(1, window)
+    if shared:
+        return jsonify(shared.stats(SHARED_KEY, window))
+    with state_lock:
+        return jsonify(history.stats(window))
+
+# 토픽 목록과 각 토픽의 마지막 값 (?prefix=sensors/dev1 로 좁히기)
+@app.route('/api/topics')
+def list_topics():
+    prefix = request.args.get("prefix", "")
+    if shared_topics:
+        return jsonify({topic: shared_topics.last(topic) for topic in shared_topics.keys()
+                        if topic.startswith(prefix)})
+    with topics_lock:
+        return jsonify({topic: ring.last() for topic, ring in sorted(topics.items())
+                        if topic.startswith(prefix)})
+
+@app.route('/api/topics/<path:topic>')
+def topic_history(topic):
+    window = max(1, request.args.get("window", HISTORY_SIZE, type=int))
+    if shared_topics:
+        if topic not in shared_topics.keys():
+            return jsonify({"error": "unknown topic"}), 404
+        return jsonify({"topic": topic, "points": shared_topics.points(topic, window),
+                        "stats": shared_topics.stats(topic, window)})
+    with topics_lock:
+        ring = topics.get(topic)
+        if ring is None:
+            return jsonify({"error": "unknown topic"}), 404
+        return jsonify({"topic": topic, "points": ring.points(window), "stats": ring.stats(window)})
+
+# 수신 큐 길이, 처리/버림/오류 개수
+@app.route('/api/ingest')
+def ingest_stats():
+    return jsonify(pipeline.stats())
 
 @app.route('/test')
 def test_publish():
-    import paho.mqtt.publish as publish
     import random
     data = {
         "temperature": round(random.uniform(20, 35), 1),
         "humidity":    round(random.uniform(40, 80), 1)
     }
-    publish.single(TOPIC, json.dumps(data), hostname=BROKER_HOST, qos=1)
+    publisher.publish(TOPIC, data, qos=1)
     return f"발행 완료: {data}"
 
 HTML_PAGE = """
@@ -112,7 +352,7 @@ HTML_PAGE = """
 <body>
 <h1>📡 MQTT Dashboard</h1>
 <div class="badge"><span></span>MQTT → Flask → WebSocket 실시간 연동</div>
-<div class="topic-info">브로커: <span>broker.emqx.io</span> | 토픽: <span>python/mqtt</span> | QoS: <span>1</span></div>
+<div class="topic-info">브로커: <span>{{ broker }}</span> | 토픽: <span>python/mqtt</span>, <span>sensors/+/+</span> | QoS: <span>1</span></div>
 <div class="cards">
   <div class="card temp">
     <div class="icon">🌡️</div>
@@ -145,20 +385,45 @@ HTML_PAGE = """
 <div class="status">마지막 업데이트: <span id="time">-</span></div>
 <script>
 const socket = io();
-socket.on('connect', () => console.log('✅ WebSocket 연결됨'));
+const HISTORY_SIZE = 50;
+let hist = [];
+let lastSeq = null;   // 마지막으로 받은 측정값 번호 (null이면 스냅샷 대기 중)
+function sync() { socket.emit('sync', { last_seq: lastSeq }); }
+socket.on('connect', () => { console.log('✅ WebSocket 연결됨'); sync(); });
+socket.on('sensor_snapshot', (data) => {
+  if (data.reset) { hist = []; lastSeq = null; }
+  data.history.forEach(p => { if (lastSeq === null || p.seq > lastSeq) hist.push(p); });
+  hist = hist.slice(-HISTORY_SIZE);
+  lastSeq = hist.length ? hist[hist.length-1].seq : data.seq;
+  render();
+});
 socket.on('sensor_update', (data) => {
-  const cur = data.current;
-  const hist = data.history;
-  document.getElementById('temp').textContent = parseFloat(cur.temperature).toFixed(1);
-  document.getElementById('humi').textContent = parseFloat(cur.humidity).toFixed(1);
-  document.getElementById('time').textContent = cur.timestamp || '-';
+  if (lastSeq === null) return;
   const logList = document.getElementById('logList');
-  const div = document.createElement('div');
-  div.textContent = `[${cur.timestamp}] 온도: ${cur.temperature}°C, 습도: ${cur.humidity}%`;
-  logList.prepend(div);
+  for (const cur of data.points) {
+    if (cur.seq <= lastSeq) continue;
+    if (cur.seq !== lastSeq + 1) { sync(); return; }  // 중간에 빠졌으면 다시 맞춤
+    hist.push(cur);
+    lastSeq = cur.seq;
+    const div = document.createElement('div');
+    div.textContent = `[${fmtTime(cur.t)}] 온도: ${cur.temperature}°C, 습도: ${cur.humidity}%`;
+    logList.prepend(div);
+  }
   while (logList.children.length > 20) logList.removeChild(logList.lastChild);
-  updateCharts(hist);
+  hist = hist.slice(-HISTORY_SIZE);
+  render();
 });
+function fmtTime(t) {
+  return new Date(t*1000).toLocaleTimeString('ko-KR', { hour12: false });
+}
+function render() {
+  const cur = hist[hist.length-1];
+  if (!cur) return;
+  document.getElementById('temp').textContent = parseFloat(cur.temperature).toFixed(1);
+  document.getElementById('humi').textContent = parseFloat(cur.humidity).toFixed(1);
+  document.getElementById('time').textContent = fmtTime(cur.t);
+  updateCharts(hist);
+}
 socket.on('disconnect', () => { document.getElementById('time').textContent = '연결 끊김'; });
 async function testPublish() {
   await fetch('/test');
@@ -200,7 +465,7 @@ function drawChart(canvasId, data, labels, color) {
   });
 }
 function updateCharts(history) {
-  const labels = history.map(d=>d.timestamp);
+  const labels = history.map(d=>fmtTime(d.t));
   drawChart('tempChart', history.map(d=>parseFloat(d.temperature)), labels, '#ff6b6b');
   drawChart('humiChart', history.map(d=>parseFloat(d.humidity)), labels, '#4ecdc4');
 }
@@ -210,4 +475,4 @@ function updateCharts(history) {
 """
 
 if __name__ == '__main__':
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
+    socketio.run(app, host='0.0.0.0', port=PORT, debug=True)
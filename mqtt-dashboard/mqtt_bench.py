@@ -0,0 +1,190 @@
+"""MQTT 대시보드 부하 테스트
+
+로컬 브로커(mosquitto)와 app.py 를 띄우고, 가상 장치 여러 대가 발행한 메시지가
+브라우저(Socket.IO 클라이언트)까지 도착하는 데 걸리는 시간을 잰다.
+
+    python3 mqtt_bench.py --devices 50 --rate 5 --duration 30 --clients 10
+
+측정 항목
+- 발행 수 / 대시보드 처리 수(초당) / 수신 큐에서 버린 수 (/api/ingest)
+- 발행 → WebSocket 수신 지연 p50 / p99 (메시지의 sent_at 기준)
+- 클라이언트별 seq 누락 개수
+
+mosquitto 가 없으면 --broker-host 로 이미 떠 있는 브로커를 지정한다.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import socketio
+
+from mqtt_publisher import Publisher
+from mqtt_test import make_reading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_port(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+# ── 로컬 브로커 / 대시보드 실행 ───────────────
+def start_broker(port):
+    exe = shutil.which("mosquitto")
+    if exe is None:
+        sys.exit("mosquitto 를 찾을 수 없습니다. 설치하거나 --broker-host 로 브로커를 지정하세요.")
+    proc = subprocess.Popen([exe, "-p", str(port)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_port("127.0.0.1", port):
+        proc.kill()
+        sys.exit("브로커가 시작되지 않았습니다")
+    return proc
+
+def start_dashboard(port, broker_host, broker_port):
+    env = dict(os.environ, MQTT_BROKER_HOST=broker_host, MQTT_BROKER_PORT=str(broker_port))
+    code = ("import app; app.socketio.run(app.app, host='127.0.0.1', port=%d, "
+            "allow_unsafe_werkzeug=True)" % port)
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=HERE, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_port("127.0.0.1", port, timeout=20):
+        proc.kill()
+        sys.exit("대시보드가 시작되지 않았습니다")
+    return proc
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=5) as res:
+        return json.loads(res.read())
+
+# ── 브라우저 대신 붙는 Socket.IO 클라이언트 ────
+class BenchClient:
+    def __init__(self, url):
+        self.latencies = []
+        self.received  = 0
+        self.missing   = 0
+        self.last_seq  = None
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on("connect", lambda: self.sio.emit("sync", {"last_seq": None}))
+        self.sio.on("sensor_snapshot", self._on_snapshot)
+        self.sio.on("sensor_update", self._on_update)
+        self.sio.connect(url, transports=["websocket"])
+
+    def _on_snapshot(self, data):
+        self.last_seq = data["seq"]
+
+    def _on_update(self, data):
+        now = time.time()
+        for p in data["points"]:
+            if self.last_seq is not None and p["seq"] > self.last_seq + 1:
+                self.missing += p["seq"] - self.last_seq - 1
+            self.last_seq = max(self.last_seq or 0, p["seq"])
+            self.received += 1
+            if "sent_at" in p:
+                self.latencies.append(now - p["sent_at"])
+
+    def close(self):
+        self.sio.disconnect()
+
+# ── 가상 장치 ────────────────────────────────
+def run_device(host, port, topic, rate, stop, counter, lock):
+    publisher = Publisher(host, port, client_id=f"bench-{random.randrange(1 << 30)}").start(wait=10)
+    interval = 1.0 / rate
+    next_at  = time.monotonic() + random.random() * interval   # 장치마다 시작 시점을 흩뜨림
+    sent = 0
+    while not stop.is_set():
+        time.sleep(max(0, next_at - time.monotonic()))
+        publisher.publish(topic, make_reading(stamp=True), qos=1)
+        sent += 1
+        next_at += interval
+    publisher.stop()
+    with lock:
+        counter[0] += sent
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="MQTT 대시보드 처리량/지연 측정")
+    parser.add_argument("--devices",  type=int,   default=20,  help="가상 장치 수")
+    parser.add_argument("--rate",     type=float, default=5,   help="장치당 초당 메시지 수")
+    parser.add_argument("--duration", type=float, default=20,  help="발행 시간(초)")
+    parser.add_argument("--clients",  type=int,   default=5,   help="Socket.IO 클라이언트 수")
+    parser.add_argument("--topic",    default="python/mqtt")
+    parser.add_argument("--broker-host", help="이미 떠 있는 브로커 (없으면 mosquitto 실행)")
+    parser.add_argument("--broker-port", type=int, default=None)
+    return parser.parse_args()
+
+def main():
+    args  = parse_args()
+    procs = []
+    try:
+        if args.broker_host:
+            broker_host, broker_port = args.broker_host, args.broker_port or 1883
+        else:
+            broker_host, broker_port = "127.0.0.1", args.broker_port or free_port()
+            procs.append(start_broker(broker_port))
+        web_port = free_port()
+        procs.append(start_dashboard(web_port, broker_host, broker_port))
+        base_url = f"http://127.0.0.1:{web_port}"
+        time.sleep(1)   # 대시보드가 브로커 구독을 마칠 때까지
+
+        clients = [BenchClient(base_url) for _ in range(args.clients)]
+        before  = get_json(base_url + "/api/ingest")
+
+        stop, lock, counter = threading.Event(), threading.Lock(), [0]
+        threads = [threading.Thread(target=run_device,
+                                    args=(broker_host, broker_port, args.topic, args.rate,
+                                          stop, counter, lock))
+                   for _ in range(args.devices)]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+        time.sleep(2)   # 큐/브로드캐스터에 남은 것 처리 대기
+
+        after = get_json(base_url + "/api/ingest")
+        for c in clients:
+            c.close()
+
+        processed = after["processed"] - before["processed"]
+        latencies = [l for c in clients for l in c.latencies]
+        print(f"장치 {args.devices}대 × {args.rate}/s, {elapsed:.1f}초, 클라이언트 {args.clients}개")
+        print(f"  발행          : {counter[0]}개 ({counter[0] / elapsed:.0f}/s)")
+        print(f"  대시보드 처리 : {processed}개 ({processed / elapsed:.0f}/s)")
+        print(f"  수신 큐 버림  : {after['dropped'] - before['dropped']}개, "
+              f"파싱 오류 {after['errors'] - before['errors']}개")
+        print(f"  WebSocket 수신: 클라이언트당 평균 {sum(c.received for c in clients) / len(clients):.0f}개, "
+              f"seq 누락 합계 {sum(c.missing for c in clients)}개")
+        print(f"  지연 p50/p99  : {percentile(latencies, 50) * 1000:.1f} ms / "
+              f"{percentile(latencies, 99) * 1000:.1f} ms")
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            proc.wait(5)
+
+if __name__ == '__main__':
+    main()
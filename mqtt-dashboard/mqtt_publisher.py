@@ -0,0 +1,126 @@
+import json
+import threading
+from collections import deque
+from paho.mqtt import client as mqtt_client
+
+# ── 재사용 MQTT 발행기 ────────────────────────
+# 메시지마다 브로커에 새로 접속하지 않고 연결 하나를 계속 사용
+# - max_inflight: ack를 기다리는 QoS 1/2 메시지 최대 개수 (넘으면 paho 내부 큐에서 대기)
+# - 연결이 끊긴 동안 발행한 메시지는 offline 버퍼에 모았다가 재접속하면 순서대로 전송
+class Publisher:
+    def __init__(self, host, port=1883, client_id="", max_inflight=100,
+                 offline_limit=10000, keepalive=60):
+        self.host      = host
+        self.port      = port
+        self.keepalive = keepalive
+        self._client = mqtt_client.Client(
+            client_id=client_id,
+            callback_api_version=mqtt_client.CallbackAPIVersion.VERSION2
+        )
+        self._client.max_inflight_messages_set(max_inflight)
+        self._client.reconnect_delay_set(min_delay=1, max_delay=30)
+        self._client.on_connect    = self._on_connect
+        self._client.on_disconnect = self._on_disconnect
+        self._offline   = deque()
+        self._offline_limit = offline_limit
+        self._lock      = threading.Lock()
+        self._connected = threading.Event()
+        self._last_info = None
+        self.sent = self.buffered = self.dropped = 0
+
+    def start(self, wait=None):
+        # wait 초 동안 첫 접속을 기다림 (None이면 기다리지 않음 — 그 사이 발행분은 버퍼에)
+        self._client.connect_async(self.host, self.port, self.keepalive)
+        self._client.loop_start()
+        if wait:
+            self._connected.wait(wait)
+        return self
+
+    def stop(self, timeout=10):
+        self.flush(timeout)
+        self._client.disconnect()
+        self._client.loop_stop()
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties):
+        if reason_code == 0:
+            self._connected.set()
+            self._drain()
+        else:
+            print(f"❌ 발행기 연결 실패: {reason_code}")
+
+    def _on_disconnect(self, client, userdata, flags, reason_code, properties):
+        self._connected.clear()
+
+    def _buffer(self, message):
+        # 호출하는 쪽에서 self._lock 을 잡고 있어야 함
+        if len(self._offline) >= self._offline_limit:
+            self._offline.popleft()
+            self.dropped += 1
+        self._offline.append(message)
+        self.buffered += 1
+
+    def _send(self, topic, payload, qos, retain):
+        info = self._client.publish(topic, payload, qos, retain)
+        if info.rc == mqtt_client.MQTT_ERR_NO_CONN:
+            return None
+        self._last_info = info
+        self.sent += 1
+        return info
+
+    def _drain(self):
+        with self._lock:
+            while self._offline and self._connected.is_set():
+                message = self._offline[0]
+                if self._send(*message) is None:
+                    break
+                self._offline.popleft()
+
+    def publish(self, topic, payload, qos=1, retain=False):
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload)
+        message = (topic, payload, qos, retain)
+        with self._lock:
+            # 버퍼에 남은 게 있으면 순서를 지키기 위해 뒤에 붙임
+            if not self._connected.is_set() or self._offline:
+                self._buffer(message)
+                return None
+            info = self._send(*message)
+            if info is None:
+                self._buffer(message)
+            return info
+
+    def publish_many(self, messages, qos=1):
+        # [(토픽, payload), ...] 를 잠금 한 번으로 발행
+        infos = []
+        with self._lock:
+            for topic, payload in messages:
+                if isinstance(payload, (dict, list)):
+                    payload = json.dumps(payload)
+                message = (topic, payload, qos, False)
+                info = None
+                if self._connected.is_set() and not self._offline:
+                    info = self._send(*message)
+                if info is None:
+                    self._buffer(message)
+                infos.append(info)
+        return infos
+
+    def flush(self, timeout=10):
+        # 지금까지 보낸 메시지가 브로커로 나갈 때까지 대기 (QoS 1/2는 ack까지)
+        info = self._last_info
+        if info is not None:
+            try:
+                info.wait_for_publish(timeout)
+            except (RuntimeError, ValueError):
+                pass
+        with self._lock:
+            return len(self._offline) == 0
+
+    def stats(self):
+        with self._lock:
+            return {"connected": self.connected, "sent": self.sent, "buffered": self.buffered,
+                    "offline": len(self._offline), "dropped": self.dropped}
@@ -1,45 +1,60 @@
+import argparse
+import json
 import random
 import time
-from paho.mqtt import client as mqtt_client
+from mqtt_publisher import Publisher
 
 broker    = 'broker.emqx.io'
 port      = 1883
 topic     = "python/mqtt"
 client_id = f'python-mqtt-{random.randint(0, 1000)}'
 
-def connect_mqtt():
-    def on_connect(client, userdata, flags, reason_code, properties):
-        if reason_code == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("Failed to connect, return code %d\n", reason_code)
-    client = mqtt_client.Client(
-        client_id=client_id,
-        callback_api_version=mqtt_client.CallbackAPIVersion.VERSION2
-    )
-    client.on_connect = on_connect
-    client.connect(broker, port)
-    return client
+def make_reading(stamp=False):
+    reading = {
+        "temperature": round(random.uniform(20, 35), 1),
+        "humidity":    round(random.uniform(40, 80), 1)
+    }
+    if stamp:
+        reading["sent_at"] = time.time()   # 받는 쪽에서 지연 시간 계산용
+    return json.dumps(reading)
 
-def publish(client):
-    msg_count = 1
-    while True:
-        time.sleep(1)
-        msg = f"messages: {msg_count}"
-        result = client.publish(topic, msg)
-        if result[0] == 0:
-            print(f"Send '{msg}' to topic '{topic}'")
-        else:
-            print(f"Failed to send message to topic {topic}")
-        msg_count += 1
-        if msg_count > 5:
-            break
+# rate: 초당 메시지 수, batch: 한 번에 묶어서 발행할 개수
+def publish(publisher, count=5, rate=1.0, batch=1):
+    interval = batch / rate
+    next_at  = time.monotonic()
+    sent     = 0
+    while sent < count:
+        n = min(batch, count - sent)
+        publisher.publish_many([(topic, make_reading()) for _ in range(n)])
+        sent += n
+        print(f"Send {sent}/{count} to topic '{topic}'")
+        next_at += interval
+        time.sleep(max(0, next_at - time.monotonic()))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="MQTT 테스트 발행 (부하 생성)")
+    parser.add_argument("--host",  default=broker)
+    parser.add_argument("--port",  type=int, default=port)
+    parser.add_argument("--topic", default=topic)
+    parser.add_argument("--count", type=int, default=5, help="보낼 메시지 수")
+    parser.add_argument("--rate",  type=float, default=1.0, help="초당 메시지 수")
+    parser.add_argument("--batch", type=int, default=1, help="한 번에 발행할 개수")
+    parser.add_argument("--inflight", type=int, default=100, help="ack 대기 최대 개수")
+    return parser.parse_args()
 
 def run():
-    client = connect_mqtt()
-    client.loop_start()
-    publish(client)
-    client.loop_stop()
+    global topic
+    args  = parse_args()
+    topic = args.topic
+    publisher = Publisher(args.host, args.port, client_id=client_id,
+                          max_inflight=args.inflight).start(wait=10)
+    if publisher.connected:
+        print("Connected to MQTT Broker!")
+    else:
+        print("Failed to connect, buffering until connected")
+    publish(publisher, args.count, args.rate, args.batch)
+    publisher.stop()
+    print(publisher.stats())
 
 if __name__ == '__main__':
     run()
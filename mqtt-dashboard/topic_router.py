@@ -0,0 +1,58 @@
+# ── MQTT 토픽 라우터 (토픽 필터 트라이) ────────
+# 'sensors/+/+' 같은 필터를 '/' 단계별 트리로 저장해 두고,
+# 메시지 토픽을 단계별로 내려가며 맞는 핸들러를 찾는다.
+# 필터 개수와 상관없이 한 메시지 라우팅 비용은 토픽 깊이에 비례한다.
+class _Node:
+    __slots__ = ("children", "handlers")
+
+    def __init__(self):
+        self.children = {}   # 단계 이름('+', '#' 포함) → _Node
+        self.handlers = []
+
+
+class TopicRouter:
+    def __init__(self):
+        self._root   = _Node()
+        self.filters = []
+
+    def add(self, topic_filter, handler):
+        node = self._root
+        for level in topic_filter.split("/"):
+            node = node.children.setdefault(level, _Node())
+        node.handlers.append(handler)
+        self.filters.append(topic_filter)
+
+    def route(self, topic_filter):
+        # @router.route('sensors/+/+') 데코레이터
+        def decorator(handler):
+            self.add(topic_filter, handler)
+            return handler
+        return decorator
+
+    def match(self, topic):
+        # [(핸들러, [와일드카드에 걸린 값들]), ...]
+        levels  = topic.split("/")
+        matches = []
+        stack   = [(self._root, 0, [])]
+        while stack:
+            node, i, params = stack.pop()
+            multi = node.children.get("#")
+            if multi is not None:
+                matches.extend((h, params + ["/".join(levels[i:])]) for h in multi.handlers)
+            if i == len(levels):
+                matches.extend((h, params) for h in node.handlers)
+                continue
+            child = node.children.get(levels[i])
+            if child is not None:
+                stack.append((child, i + 1, params))
+            child = node.children.get("+")
+            if child is not None:
+                stack.append((child, i + 1, params + [levels[i]]))
+        return matches
+
+    def dispatch(self, topic, payload):
+        # 맞는 핸들러가 하나도 없으면 False
+        matches = self.match(topic)
+        for handler, params in matches:
+            handler(topic, payload, *params)
+        return bool(matches)
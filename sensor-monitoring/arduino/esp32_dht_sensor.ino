@@ -8,7 +8,20 @@
 
 const char* ssid     = "RPI_Hotspot";
 const char* password = "12345678";
-const char* serverURL = "http://10.42.0.1:5000/api/sensor";
+const char* serverURL = "http://10.42.0.1:5000/api/sensor/batch";
+const char* deviceId  = "esp32-01";   // 보드마다 다르게 설정
+
+#define READ_INTERVAL 2000   // 측정 간격 (ms)
+#define BATCH_SIZE    15     // 이만큼 모이면 한 번에 업로드 (2초 × 15 = 30초마다)
+
+struct Reading {
+    unsigned long readAt;    // millis() 기준 측정 시각
+    float temperature;
+    float humidity;
+};
+
+Reading buffer[BATCH_SIZE];
+int bufferCount = 0;
 
 DHT dht(DHTPIN, DHTTYPE);
 
@@ -26,36 +39,59 @@ void setup() {
     Serial.println(WiFi.localIP());
 }
 
+// 모아 둔 측정값을 /api/sensor/batch 로 한 번에 전송
+// 각 측정값은 "업로드 시점 기준 몇 ms 전"(age_ms)으로 보내서 ESP32에 시계가 없어도 됨
+bool uploadBatch() {
+    if (WiFi.status() != WL_CONNECTED) return false;
+
+    DynamicJsonDocument doc(128 + BATCH_SIZE * 96);
+    doc["device_id"] = deviceId;
+    JsonArray readings = doc.createNestedArray("readings");
+    unsigned long now = millis();
+    for (int i = 0; i < bufferCount; i++) {
+        JsonObject r = readings.createNestedObject();
+        r["age_ms"]      = now - buffer[i].readAt;
+        r["temperature"] = buffer[i].temperature;
+        r["humidity"]    = buffer[i].humidity;
+    }
+    String jsonStr;
+    serializeJson(doc, jsonStr);
+
+    HTTPClient http;
+    http.begin(serverURL);
+    http.addHeader("Content-Type", "application/json");
+    int httpCode = http.POST(jsonStr);
+    http.end();
+
+    if (httpCode == 200) {
+        Serial.printf("✅ %d개 전송 성공\n", bufferCount);
+        return true;
+    }
+    Serial.printf("❌ 전송 실패, 코드: %d\n", httpCode);
+    return false;
+}
+
 void loop() {
     float humidity    = dht.readHumidity();
     float temperature = dht.readTemperature();
 
     if (isnan(humidity) || isnan(temperature)) {
         Serial.println("❌ DHT 센서 읽기 실패!");
-        delay(2000);
+        delay(READ_INTERVAL);
         return;
     }
 
     Serial.printf("온도: %.1f°C, 습도: %.1f%%\n", temperature, humidity);
 
-    if (WiFi.status() == WL_CONNECTED) {
-        HTTPClient http;
-        http.begin(serverURL);
-        http.addHeader("Content-Type", "application/json");
-
-        StaticJsonDocument<100> doc;
-        doc["temperature"] = temperature;
-        doc["humidity"]    = humidity;
-        String jsonStr;
-        serializeJson(doc, jsonStr);
-
-        int httpCode = http.POST(jsonStr);
-        if (httpCode == 200) {
-            Serial.println("✅ 서버 전송 성공");
-        } else {
-            Serial.printf("❌ 전송 실패, 코드: %d\n", httpCode);
-        }
-        http.end();
+    // 버퍼가 가득 찼는데 전송이 계속 실패하면 가장 오래된 값을 버림
+    if (bufferCount == BATCH_SIZE) {
+        memmove(buffer, buffer + 1, sizeof(Reading) * (BATCH_SIZE - 1));
+        bufferCount--;
+    }
+    buffer[bufferCount++] = { millis(), temperature, humidity };
+
+    if (bufferCount >= BATCH_SIZE && uploadBatch()) {
+        bufferCount = 0;
     }
-    delay(2000);
+    delay(READ_INTERVAL);
 }
@@ -1,35 +1,373 @@
-from flask import Flask, render_template_string
-from flask_socketio import SocketIO
-from datetime import datetime
-from collections import deque
+from flask import Flask, render_template_string, request, jsonify
+from flask_socketio import SocketIO, join_room, leave_room
+from sensor_store import SensorStore
+import threading
+import struct
+import math
+import time
+import sys
+import re
+import os
+
+# 링 버퍼/Redis 공유 기록은 mqtt-dashboard 와 함께 쓰는 저장소 최상위 sensor_common/ 에 있음
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from sensor_common.ring_buffer import SensorRing
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'secret!'
-socketio = SocketIO(app, cors_allowed_origins="*")
 
-history = deque(maxlen=50)
-sensor_data = {"temperature": 0, "humidity": 0, "timestamp": ""}
+# 워커 프로세스를 여러 개 띄울 때 (README "여러 프로세스로 실행" 참고)
+# - emit 은 메시지 큐(Redis)를 거쳐 모든 워커의 브라우저에게 전달
+# - seq 번호와 최근 기록은 SHARED_HISTORY_URL(기본: 메시지 큐와 같은 Redis)에 공유
+MESSAGE_QUEUE      = os.environ.get("SOCKETIO_MESSAGE_QUEUE")           # 예: redis://localhost:6379/0
+SHARED_HISTORY_URL = os.environ.get("SHARED_HISTORY_URL", MESSAGE_QUEUE)
+SHARED_CAPACITY    = int(os.environ.get("SHARED_HISTORY_CAPACITY", 3600))  # 장치당 Redis에 두는 개수
+PORT               = int(os.environ.get("PORT", 5000))
+
+socketio = SocketIO(app, cors_allowed_origins="*", message_queue=MESSAGE_QUEUE)
+
+HISTORY_SIZE   = 50       # 브라우저에 보여주는 개수
+HISTORY_CAPACITY = int(os.environ.get("HISTORY_CAPACITY", 86400))  # 장치당 메모리에 들고 있는 개수 (1초 간격 24시간)
+DEFAULT_DEVICE = "default"   # device_id 없이 보내는 기존 보드용
+EMIT_RATE      = float(os.environ.get("EMIT_RATE", 5))   # room당 초당 최대 전송 횟수
+MAX_DEVICES    = int(os.environ.get("MAX_DEVICES", 1000))   # 장치 최대 개수 (device_id 는 인증 없이 들어오므로)
+STORE_PATH     = os.environ.get("SENSOR_STORE_PATH",
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), "sensor_history.db"))
+RELOAD_WINDOW  = 86400   # 시작할 때 DB에서 메모리로 다시 올리는 기간(초)
+RETENTION_DAYS = int(os.environ.get("SENSOR_RETENTION_DAYS", 3650))   # 압축 블록 덕분에 몇 년치도 보관 가능
+
+store = SensorStore(STORE_PATH, retention_days=RETENTION_DAYS)
+
+if SHARED_HISTORY_URL:
+    from sensor_common.shared_history import SharedHistory   # redis 패키지 필요
+    shared = SharedHistory(SHARED_HISTORY_URL, "sensor", SHARED_CAPACITY)
+else:
+    shared = None
+
+# ── 장치별 상태 ──────────────────────────────
+# 측정값마다 seq 번호를 붙여서, 브라우저는 처음(또는 재연결) 한 번만 전체 기록을 받고
+# 이후에는 새 측정값 하나씩만 받는다
+class DeviceState:
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.ring      = SensorRing(HISTORY_CAPACITY)
+        self.lock      = threading.Lock()
+
+    def update(self, temperature, humidity):
+        return self.update_many([(time.time(), float(temperature), float(humidity))])[0]
+
+    def update_many(self, readings):
+        # (시각, 온도, 습도) 여러 개를 잠금 한 번으로 추가
+        points = []
+        with self.lock:
+            for t, temperature, humidity in readings:
+                seq = self.ring.append(t, temperature, humidity)
+                points.append({"seq": seq, "t": t, "temperature": temperature, "humidity": humidity})
+        return points
+
+    def snapshot(self, since=None):
+        # since: 브라우저가 마지막으로 받은 seq — 그 뒤가 버퍼에 있고 화면 개수 이내면 그 뒤만 보냄
+        with self.lock:
+            ring = self.ring
+            last = ring.last_seq
+            if since is not None and len(ring) and ring.first_seq - 1 <= since <= last \
+                    and last - since <= HISTORY_SIZE:
+                return {"device_id": self.device_id, "seq": last, "reset": False,
+                        "history": ring.points(last - since)}
+            return {"device_id": self.device_id, "seq": last, "reset": True,
+                    "history": ring.points(HISTORY_SIZE)}
+
+    def stats(self, n=None):
+        with self.lock:
+            return self.ring.stats(n)
+
+# 워커 여러 개 모드: 다른 워커가 받은 측정값도 보이도록 seq 번호/최근 기록/통계를 Redis에서
+class SharedDeviceState(DeviceState):
+    def __init__(self, device_id):
+        self.device_id = device_id
+
+    def update_many(self, readings):
+        return shared.append_many(self.device_id, readings)
+
+    def snapshot(self, since=None):
+        return dict(shared.snapshot(self.device_id, since, HISTORY_SIZE), device_id=self.device_id)
+
+    def stats(self, n=None):
+        return shared.stats(self.device_id, n)
+
+devices = {}
+devices_lock = threading.Lock()
+
+# device_id 는 인증 없이 들어오고 화면(장치 선택 목록)에도 나오므로 형식을 제한
+DEVICE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+def clean_device_id(value):
+    device_id = str(value or DEFAULT_DEVICE)
+    if not DEVICE_ID_PATTERN.fullmatch(device_id):
+        raise ValueError("device_id 는 영문, 숫자, _, - 로 된 1~64자여야 합니다")
+    return device_id
+
+# MAX_DEVICES 가 차면 새 장치는 받지 않음 (403)
+class TooManyDevices(ValueError):
+    pass
+
+def get_device(device_id):
+    with devices_lock:
+        state = devices.get(device_id)
+        if state is None:
+            if shared:
+                if shared.key_count() >= MAX_DEVICES and not shared.has_key(device_id):
+                    raise TooManyDevices(f"장치가 {MAX_DEVICES}개를 넘어 새 장치를 받지 않습니다")
+            elif len(devices) >= MAX_DEVICES:
+                raise TooManyDevices(f"장치가 {MAX_DEVICES}개를 넘어 새 장치를 받지 않습니다")
+            state = devices[device_id] = (SharedDeviceState if shared else DeviceState)(device_id)
+        return state
+
+# 구독/조회용 — 없는 장치면 만들지 않고 None
+def find_device(device_id):
+    with devices_lock:
+        state = devices.get(device_id)
+    if state is None and shared and shared.has_key(device_id):
+        state = get_device(device_id)   # 다른 워커가 받은 장치
+    return state
+
+def known_devices():
+    if shared:
+        return shared.keys()
+    with devices_lock:
+        return sorted(devices)
+
+def load_history():
+    # 재시작해도 최근 기록과 seq 번호가 이어지도록 DB에서 복원
+    # (워커 여러 개 모드에서는 Redis가 DB보다 뒤처져 있을 때만 채움 — 먼저 뜬 워커 한 번만 적용됨)
+    # 기록은 최근 RELOAD_WINDOW 만, seq 번호는 오래 조용했던 장치까지 전체 기록의 마지막 번호에서 이어감
+    recent = store.load_recent(RELOAD_WINDOW, HISTORY_CAPACITY)
+    last_seqs = store.last_seqs()
+    for device_id, last_seq in last_seqs.items():
+        rows = recent.get(device_id, [])
+        if rows and rows[-1][0] != last_seq:
+            rows = []   # 시계가 바뀌어 최근 기록이 마지막 번호가 아님 — 번호만 이어받음
+        if shared:
+            shared.seed(device_id, rows, last_seq)
+        else:
+            try:
+                ring = get_device(device_id).ring
+            except TooManyDevices:
+                print(f"[복원] MAX_DEVICES({MAX_DEVICES}) 초과 — {device_id} 건너뜀")
+                continue
+            ring.load(rows)
+            ring.last_seq = last_seq
+    print(f"[복원] 장치 {len(last_seqs)}개 번호, 그중 {len(recent)}개 최근 기록 불러옴")
+
+# 구독은 장치를 만들지 않음 — 아직 값이 없는 장치는 빈 기록 (첫 측정값부터 room 으로 받음)
+def device_snapshot(device_id, since=None):
+    state = find_device(device_id)
+    if state is None:
+        return {"device_id": device_id, "seq": 0, "reset": True, "history": []}
+    return state.snapshot(since)
+
+def room_for(device_id):
+    return f"device:{device_id}"
+
+# ── 전송 묶기 (센서 속도와 상관없이 room당 EMIT_RATE 번) ──
+class Broadcaster:
+    def __init__(self, rate=EMIT_RATE):
+        self.interval = 1.0 / rate
+        self._pending = {}             # device_id → 아직 안 보낸 측정값들
+        self._lock    = threading.Lock()
+        self._started = False
+
+    def push(self, device_id, point):
+        with self._lock:
+            points = self._pending.setdefault(device_id, [])
+            points.append(point)
+            # 브라우저도 HISTORY_SIZE 개만 들고 있으므로 그 이상은 버림 (seq가 끊기면 스냅샷으로 맞춤)
+            del points[:-HISTORY_SIZE]
+
+    def take(self):
+        # 모인 측정값을 통째로 넘겨받고 비움 (async_app.AsyncBroadcaster 도 같이 씀)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def start(self):
+        if not self._started:
+            self._started = True
+            socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.interval)
+            for device_id, points in self.take().items():
+                socketio.emit('sensor_update', {"device_id": device_id, "points": points},
+                              to=room_for(device_id))
+
+broadcaster = Broadcaster()
+
+def parse_reading(data):
+    # {"temperature": .., "humidity": ..} → (온도, 습도), 숫자가 아니면 ValueError
+    try:
+        temperature = float(data.get("temperature", 0))
+        humidity    = float(data.get("humidity", 0))
+    except (TypeError, ValueError):
+        raise ValueError("temperature/humidity 는 숫자여야 합니다") from None
+    now = time.time()
+    if not valid_reading(now, temperature, humidity, now):
+        raise ValueError("측정 범위를 벗어났습니다 (온도 -40~125, 습도 0~100)")
+    return temperature, humidity
 
 @app.route('/api/sensor', methods=['POST'])
 def receive_sensor():
-    from flask import request, jsonify
-    global sensor_data
-    data = request.get_json()
-    sensor_data = {
-        "temperature": data.get("temperature", 0),
-        "humidity":    data.get("humidity", 0),
-        "timestamp":   datetime.now().strftime("%H:%M:%S")
-    }
-    history.append(dict(sensor_data))
-    print(f"[수신] 온도: {sensor_data['temperature']}°C, 습도: {sensor_data['humidity']}%")
-
-    # 모든 연결된 브라우저에 즉시 전송
-    socketio.emit('sensor_update', {
-        "current": sensor_data,
-        "history": list(history)
-    })
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "error": "JSON 객체가 필요합니다"}), 400
+    try:
+        device_id = clean_device_id(data.get("device_id"))
+        temperature, humidity = parse_reading(data)
+    except ValueError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+    try:
+        point = get_device(device_id).update(temperature, humidity)
+    except TooManyDevices as e:
+        return jsonify({"status": "error", "error": str(e)}), 403
+    store.put(device_id, point)   # 디스크 기록은 백그라운드 스레드가 나중에 묶어서
+    print(f"[수신] {device_id} | 온도: {point['temperature']}°C, 습도: {point['humidity']}%")
+
+    # 바로 보내지 않고 모아 두면 broadcaster가 이 장치 room에 새 측정값들만 전송
+    broadcaster.push(device_id, point)
     return jsonify({"status": "ok"})
 
+# ── 묶음 수신 (ESP32가 모아 두었다가 N초마다 업로드) ──
+# JSON:   {"device_id": "esp32-01", "readings": [{"age_ms": 4000, "temperature": 24.1, "humidity": 51}, ...]}
+#         각 측정값은 "t"(epoch 초) 또는 "age_ms"(업로드 시점 기준 몇 ms 전) 중 하나
+# 바이너리 (Content-Type: application/octet-stream):
+#         [장치 ID 길이 1바이트][장치 ID][레코드 × N]  레코드 = age_ms uint32, 온도×10 int16, 습도×10 int16 (little endian)
+BATCH_MAX = 1000
+RECORD    = struct.Struct("<Ihh")
+MAX_READING_AGE = int(os.environ.get("MAX_READING_AGE", 7 * 86400))   # 이보다 오래된 시각의 측정값은 거부(초)
+
+def valid_reading(t, temperature, humidity, now):
+    return (math.isfinite(t) and now - MAX_READING_AGE <= t <= now + 60
+            and -40 <= temperature <= 125 and 0 <= humidity <= 100)
+
+# 개수 제한은 전체를 풀어 보기 전에 확인 (413)
+class BatchTooLarge(ValueError):
+    pass
+
+def parse_binary_batch(body):
+    if not body or len(body) < 1 + body[0]:
+        raise ValueError("헤더가 잘못되었습니다")
+    device_id = body[1:1 + body[0]].decode("utf-8")
+    payload   = memoryview(body)[1 + body[0]:]
+    if len(payload) % RECORD.size:
+        raise ValueError("레코드 길이가 맞지 않습니다")
+    if len(payload) // RECORD.size > BATCH_MAX:
+        raise BatchTooLarge(f"한 번에 최대 {BATCH_MAX}개")
+    now = time.time()
+    return device_id, [(now - age / 1000, temp / 10, hum / 10)
+                       for age, temp, hum in RECORD.iter_unpack(payload)]
+
+def parse_json_batch(data):
+    if isinstance(data, list):
+        data = {"readings": data}
+    if not isinstance(data, dict) or not isinstance(data.get("readings"), list):
+        raise ValueError("readings 배열이 필요합니다")
+    if len(data["readings"]) > BATCH_MAX:
+        raise BatchTooLarge(f"한 번에 최대 {BATCH_MAX}개")
+    now = time.time()
+    readings = []
+    for r in data["readings"]:
+        if not isinstance(r, dict):
+            readings.append(None)   # 객체가 아닌 항목은 그 항목만 거부
+            continue
+        try:
+            t = float(r["t"]) if "t" in r else now - float(r.get("age_ms", 0)) / 1000
+            readings.append((t, float(r["temperature"]), float(r["humidity"])))
+        except (TypeError, ValueError, KeyError):
+            readings.append(None)
+    return data.get("device_id"), readings
+
+@app.route('/api/sensor/batch', methods=['POST'])
+def receive_sensor_batch():
+    try:
+        if request.mimetype == "application/octet-stream":
+            device_id, readings = parse_binary_batch(request.get_data())
+        else:
+            device_id, readings = parse_json_batch(request.get_json(silent=True))
+        device_id = clean_device_id(device_id)
+    except BatchTooLarge as e:
+        return jsonify({"status": "error", "error": str(e)}), 413
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+
+    now   = time.time()
+    valid = sorted(r for r in readings if r is not None and valid_reading(*r, now))
+    try:
+        points = get_device(device_id).update_many(valid)
+    except TooManyDevices as e:
+        return jsonify({"status": "error", "error": str(e)}), 403
+    for point in points:
+        store.put(device_id, point)
+        broadcaster.push(device_id, point)
+    print(f"[묶음 수신] {device_id} | {len(points)}개 (거부 {len(readings) - len(points)}개)")
+    return jsonify({"status": "ok", "accepted": len(points), "rejected": len(readings) - len(points)})
+
+@app.route('/api/devices')
+def list_devices():
+    return jsonify(known_devices())
+
+# 최근 window 개(기본 전체) 평균/최소/최대/표준편차
+@app.route('/api/stats')
+def device_stats():
+    device_id = request.args.get("device", DEFAULT_DEVICE)
+    window = request.args.get("window", type=int)
+    if window is not None:
+        window = max(1, window)
+    state = find_device(device_id)
+    if state is None:
+        return jsonify({"error": "unknown device"}), 404
+    return jsonify(state.stats(window))
+
+# 디스크 저장 큐 상태 (대기 중인 개수, 버린 개수)
+@app.route('/api/store')
+def store_stats():
+    return jsonify(store.stats())
+
+# 디스크에 저장된 기록 (압축 블록 포함) — from/to 는 epoch 초, 기본 최근 1시간
+@app.route('/api/history')
+def device_history():
+    device_id = request.args.get("device", DEFAULT_DEVICE)
+    now   = time.time()
+    end   = request.args.get("to", now, type=float)
+    start = request.args.get("from", end - 3600, type=float)
+    if start >= end:
+        return jsonify({"error": "from must be less than to"}), 400
+    rows = store.query(device_id, start, end)
+    return jsonify({
+        "device_id": device_id,
+        "seq":         [r[0] for r in rows],
+        "t":           [r[1] for r in rows],
+        "temperature": [r[2] for r in rows],
+        "humidity":    [r[3] for r in rows],
+    })
+
+# ── 브라우저 구독 ────────────────────────────
+@socketio.on('subscribe')
+def on_subscribe(msg):
+    msg = msg or {}
+    try:
+        device_id = clean_device_id(msg.get("device_id"))
+    except ValueError:
+        return
+    join_room(room_for(device_id))
+    # 구독(재연결) 직후 빠진 부분만, 처음이면 전체 기록을 그 브라우저에만 보냄
+    socketio.emit('sensor_snapshot', device_snapshot(device_id, msg.get("last_seq")), to=request.sid)
+
+@socketio.on('unsubscribe')
+def on_unsubscribe(msg):
+    device_id = str((msg or {}).get("device_id") or DEFAULT_DEVICE)
+    leave_room(room_for(device_id))
+
 @app.route('/')
 def index():
     return render_template_string(HTML_PAGE)
@@ -61,6 +399,8 @@ HTML_PAGE = """
   .chart-wrap { background: #1a1a2e; border-radius: 20px; padding: 25px; margin: 0 auto 20px; max-width: 860px; border: 1px solid #ffffff10; }
   .chart-title { font-size: 0.75rem; color: #555; letter-spacing: 2px; margin-bottom: 15px; text-transform: uppercase; }
   canvas { width: 100% !important; display: block; }
+  .device-select { text-align: center; font-size: 0.8rem; color: #666; margin-bottom: 25px; }
+  .device-select select { background: #1a1a2e; color: #fff; border: 1px solid #ffffff20; border-radius: 8px; padding: 4px 10px; }
   .status { text-align: center; font-size: 0.8rem; color: #444; margin-top: 20px; }
   .status span { color: #4ecdc4; }
 </style>
@@ -69,6 +409,7 @@ HTML_PAGE = """
 
 <h1>🌡 Sensor Monitor</h1>
 <div class="ws-badge"><span></span>WebSocket 실시간 연결</div>
+<div class="device-select">장치: <select id="device"></select></div>
 
 <div class="cards">
   <div class="card temp">
@@ -99,19 +440,76 @@ HTML_PAGE = """
 <script>
 // WebSocket 연결
 const socket = io();
+const deviceSelect = document.getElementById('device');
+let currentDevice = new URLSearchParams(location.search).get('device') || 'default';
+const HISTORY_SIZE = 50;
+let hist = [];
+let lastSeq = null;   // 마지막으로 받은 측정값 번호 (null이면 스냅샷 대기 중)
+
+// 장치를 바꾸면 이전 room에서 나가고 새 room 구독
+function subscribe(deviceId) {
+  if (deviceId !== currentDevice) {
+    socket.emit('unsubscribe', { device_id: currentDevice });
+    hist = []; lastSeq = null;
+  }
+  currentDevice = deviceId;
+  socket.emit('subscribe', { device_id: deviceId, last_seq: lastSeq });
+}
+
+async function loadDevices() {
+  const ids = await (await fetch('/api/devices')).json();
+  if (!ids.includes(currentDevice)) ids.unshift(currentDevice);
+  // 장치 ID 는 센서가 보낸 문자열이므로 HTML 로 넣지 않고 textContent/value 로
+  deviceSelect.replaceChildren(...ids.map(id => {
+    const option = document.createElement('option');
+    option.value = option.textContent = id;
+    return option;
+  }));
+  deviceSelect.value = currentDevice;
+}
+deviceSelect.addEventListener('change', () => subscribe(deviceSelect.value));
 
 socket.on('connect', () => {
   console.log('✅ WebSocket 연결됨');
+  loadDevices();
+  subscribe(currentDevice);  // 재연결 시 last_seq 이후만 다시 받음
+});
+
+// 전체(reset) 또는 빠진 부분만 담긴 스냅샷
+socket.on('sensor_snapshot', (data) => {
+  if (data.device_id !== currentDevice) return;
+  if (data.reset) { hist = []; lastSeq = null; }
+  data.history.forEach(p => { if (lastSeq === null || p.seq > lastSeq) hist.push(p); });
+  hist = hist.slice(-HISTORY_SIZE);
+  lastSeq = hist.length ? hist[hist.length - 1].seq : data.seq;
+  render();
 });
 
+// 이후에는 새 측정값들만 (서버가 EMIT_RATE 주기로 묶어서 보냄)
 socket.on('sensor_update', (data) => {
-  const cur = data.current;
-  const hist = data.history;
+  if (data.device_id !== currentDevice || lastSeq === null) return;
+  for (const p of data.points) {
+    if (p.seq <= lastSeq) continue;
+    if (p.seq !== lastSeq + 1) { subscribe(currentDevice); return; }  // 중간에 빠졌으면 다시 맞춤
+    hist.push(p);
+    lastSeq = p.seq;
+  }
+  hist = hist.slice(-HISTORY_SIZE);
+  render();
+});
+
+function fmtTime(t) {
+  return new Date(t * 1000).toLocaleTimeString('ko-KR', { hour12: false });
+}
+
+function render() {
+  const cur = hist[hist.length - 1];
+  if (!cur) return;
   document.getElementById('temp').textContent = parseFloat(cur.temperature).toFixed(1);
   document.getElementById('humi').textContent = parseFloat(cur.humidity).toFixed(1);
-  document.getElementById('time').textContent = cur.timestamp || '-';
+  document.getElementById('time').textContent = fmtTime(cur.t);
   updateCharts(hist);
-});
+}
 
 socket.on('disconnect', () => {
   document.getElementById('time').textContent = '연결 끊김';
@@ -166,7 +564,7 @@ function drawChart(canvasId, data, labels, color) {
 }
 
 function updateCharts(history) {
-  const labels = history.map(d => d.timestamp);
+  const labels = history.map(d => fmtTime(d.t));
   drawChart('tempChart', history.map(d => parseFloat(d.temperature)), labels, '#ff6b6b');
   drawChart('humiChart', history.map(d => parseFloat(d.humidity)), labels, '#4ecdc4');
 }
@@ -176,4 +574,8 @@ function updateCharts(history) {
 """
 
 if __name__ == '__main__':
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
+    load_history()
+    store.start()
+    broadcaster.start()
+    # 리로더를 켜면 부모/자식 프로세스가 둘 다 load_history()/store.start() 를 실행해 같은 파일에 저장 스레드가 둘이 됨
+    socketio.run(app, host='0.0.0.0', port=PORT, debug=True, use_reloader=False)
@@ -0,0 +1,177 @@
+"""asyncio 버전 서버 (aiohttp + python-socketio AsyncServer)
+
+app.py 와 같은 주소/같은 이벤트를 제공하지만, HTTP 수신과 Socket.IO 가 이벤트 루프 하나에서 돈다.
+요청마다 스레드를 쓰지 않으므로 ESP32/브라우저 연결이 많아도 라즈베리파이 코어 몇 개로 버틸 수 있다.
+
+    python3 async_app.py            # PORT 환경변수로 포트 변경 (기본 5000)
+
+장치 상태, 묶음 파싱, 디스크 저장(SensorStore), 화면(HTML_PAGE)은 app.py 것을 그대로 사용한다.
+여러 프로세스 모드(SOCKETIO_MESSAGE_QUEUE / SHARED_HISTORY_URL)는 app.py 에서만 지원하며, 설정되어 있으면 시작하지 않는다.
+"""
+import asyncio
+import time
+
+import socketio
+from aiohttp import web
+
+import app
+from app import (BatchTooLarge, Broadcaster, DEFAULT_DEVICE, HTML_PAGE, PORT, TooManyDevices,
+                 clean_device_id, device_snapshot, find_device, get_device, known_devices,
+                 load_history, parse_binary_batch, parse_json_batch, parse_reading, room_for,
+                 store, valid_reading)
+
+# 이 서버의 emit 은 메시지 큐를 거치지 않으므로, 다른 워커의 브라우저에는 측정값이 가지 않음
+if app.MESSAGE_QUEUE or app.SHARED_HISTORY_URL:
+    raise SystemExit("async_app.py 는 여러 프로세스 모드를 지원하지 않습니다 — "
+                     "SOCKETIO_MESSAGE_QUEUE / SHARED_HISTORY_URL 을 지우거나 app.py 로 실행하세요")
+
+sio = socketio.AsyncServer(async_mode="aiohttp", cors_allowed_origins="*")
+web_app = web.Application()
+sio.attach(web_app)
+
+# ── 전송 묶기 (센서 속도와 상관없이 room당 EMIT_RATE 번) ──
+# 모으고 자르는 부분은 app.Broadcaster 그대로, 보내는 루프만 asyncio 로
+class AsyncBroadcaster(Broadcaster):
+    def start(self):
+        if not self._started:
+            self._started = True
+            self._task = asyncio.get_running_loop().create_task(self._run())   # 참조를 들고 있어야 GC 되지 않음
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            for device_id, points in self.take().items():
+                await sio.emit('sensor_update', {"device_id": device_id, "points": points},
+                               room=room_for(device_id))
+
+broadcaster = AsyncBroadcaster()
+
+def error(message, status):
+    return web.json_response({"status": "error", "error": message}, status=status)
+
+# ── HTTP ─────────────────────────────────────
+routes = web.RouteTableDef()
+
+@routes.post('/api/sensor')
+async def receive_sensor(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return error("JSON 객체가 필요합니다", 400)
+    try:
+        device_id = clean_device_id(data.get("device_id"))
+        temperature, humidity = parse_reading(data)
+    except ValueError as e:
+        return error(str(e), 400)
+    try:
+        point = get_device(device_id).update(temperature, humidity)
+    except TooManyDevices as e:
+        return error(str(e), 403)
+    store.put(device_id, point)
+    print(f"[수신] {device_id} | 온도: {point['temperature']}°C, 습도: {point['humidity']}%")
+    broadcaster.push(device_id, point)
+    return web.json_response({"status": "ok"})
+
+@routes.post('/api/sensor/batch')
+async def receive_sensor_batch(request):
+    try:
+        if request.content_type == "application/octet-stream":
+            device_id, readings = parse_binary_batch(await request.read())
+        else:
+            try:
+                data = await request.json()
+            except ValueError:
+                data = None
+            device_id, readings = parse_json_batch(data)
+        device_id = clean_device_id(device_id)
+    except BatchTooLarge as e:
+        return error(str(e), 413)
+    except (ValueError, UnicodeDecodeError) as e:
+        return error(str(e), 400)
+
+    now   = time.time()
+    valid = sorted(r for r in readings if r is not None and valid_reading(*r, now))
+    try:
+        points = get_device(device_id).update_many(valid)
+    except TooManyDevices as e:
+        return error(str(e), 403)
+    for point in points:
+        store.put(device_id, point)
+        broadcaster.push(device_id, point)
+    print(f"[묶음 수신] {device_id} | {len(points)}개 (거부 {len(readings) - len(points)}개)")
+    return web.json_response({"status": "ok", "accepted": len(points),
+                              "rejected": len(readings) - len(points)})
+
+@routes.get('/api/devices')
+async def list_devices(request):
+    return web.json_response(known_devices())
+
+@routes.get('/api/stats')
+async def device_stats(request):
+    device_id = request.query.get("device", DEFAULT_DEVICE)
+    try:
+        window = max(1, int(request.query["window"])) if "window" in request.query else None
+    except ValueError:
+        window = None
+    state = find_device(device_id)
+    if state is None:
+        return web.json_response({"error": "unknown device"}, status=404)
+    return web.json_response(state.stats(window))
+
+@routes.get('/api/store')
+async def store_stats(request):
+    return web.json_response(store.stats())
+
+@routes.get('/api/history')
+async def device_history(request):
+    device_id = request.query.get("device", DEFAULT_DEVICE)
+    try:
+        end   = float(request.query.get("to", time.time()))
+        start = float(request.query.get("from", end - 3600))
+    except ValueError:
+        return web.json_response({"error": "from/to must be numbers"}, status=400)
+    if start >= end:
+        return web.json_response({"error": "from must be less than to"}, status=400)
+    # SQLite 읽기는 블로킹이므로 스레드에서
+    rows = await asyncio.to_thread(store.query, device_id, start, end)
+    return web.json_response({
+        "device_id": device_id,
+        "seq":         [r[0] for r in rows],
+        "t":           [r[1] for r in rows],
+        "temperature": [r[2] for r in rows],
+        "humidity":    [r[3] for r in rows],
+    })
+
+@routes.get('/')
+async def index(request):
+    return web.Response(text=HTML_PAGE, content_type="text/html")
+
+web_app.add_routes(routes)
+
+# ── 브라우저 구독 ────────────────────────────
+@sio.on('subscribe')
+async def on_subscribe(sid, msg):
+    msg = msg or {}
+    try:
+        device_id = clean_device_id(msg.get("device_id"))
+    except ValueError:
+        return
+    await sio.enter_room(sid, room_for(device_id))
+    await sio.emit('sensor_snapshot', device_snapshot(device_id, msg.get("last_seq")), to=sid)
+
+@sio.on('unsubscribe')
+async def on_unsubscribe(sid, msg):
+    device_id = str((msg or {}).get("device_id") or DEFAULT_DEVICE)
+    await sio.leave_room(sid, room_for(device_id))
+
+async def on_startup(_):
+    broadcaster.start()
+
+web_app.on_startup.append(on_startup)
+
+if __name__ == '__main__':
+    load_history()
+    store.start()
+    web.run_app(web_app, host='0.0.0.0', port=PORT)
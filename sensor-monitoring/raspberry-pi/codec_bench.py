@@ -0,0 +1,102 @@
+"""측정값 압축(series_codec) 벤치마크
+
+실제와 비슷한 센서 기록을 만들어서 압축률과 인코딩/디코딩 속도를 잰다.
+
+    python3 codec_bench.py --hours 24 --interval 1
+
+- DHT11: 정수 단위 온도/습도, DHT22: 0.1 단위
+- 전송 지연 때문에 시각이 조금씩 흔들림 (--jitter, 초)
+- SQLite 에 행으로 저장했을 때와 블록으로 저장했을 때 파일 크기도 비교
+"""
+import argparse
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from series_codec import encode_block, decode_block
+from sensor_store import SCHEMA
+
+def make_series(hours, interval, jitter, resolution, seed=0):
+    rng  = random.Random(seed)
+    t0   = time.time() - hours * 3600
+    n    = int(hours * 3600 / interval)
+    temp, hum = 22.0, 55.0
+    rows = []
+    for seq in range(1, n + 1):
+        t = t0 + seq * interval + rng.gauss(0, jitter)
+        # 하루 주기 + 느린 무작위 변화
+        daily = 3 * math.sin(2 * math.pi * (seq * interval) / 86400)
+        temp += rng.gauss(0, 0.02)
+        hum  += rng.gauss(0, 0.05)
+        rows.append((seq, t,
+                     round((temp + daily) / resolution) * resolution,
+                     round((hum - daily) / resolution) * resolution))
+    return rows
+
+def hourly_blocks(rows, size=3600):
+    block = []
+    for row in rows:
+        if block and (len(block) >= size or int(row[1] // 3600) != int(block[0][1] // 3600)):
+            yield block
+            block = []
+        block.append(row)
+    if block:
+        yield block
+
+def sqlite_size(fill):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA)
+        with conn:
+            fill(conn)
+        conn.execute("VACUUM")
+        conn.close()
+        return os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+def run(name, rows, args):
+    started = time.perf_counter()
+    blocks  = [encode_block(b) for b in hourly_blocks(rows, args.block)]
+    enc     = time.perf_counter() - started
+
+    started = time.perf_counter()
+    decoded = [p for b in blocks for p in decode_block(b)]
+    dec     = time.perf_counter() - started
+    assert len(decoded) == len(rows)
+
+    packed   = sum(len(b) for b in blocks)
+    raw_rows = sqlite_size(lambda c: c.executemany(
+        "INSERT INTO readings VALUES ('bench', ?, ?, ?, ?)", rows))
+    raw_blocks = sqlite_size(lambda c: c.executemany(
+        "INSERT INTO blocks VALUES ('bench', ?, ?, ?, ?, ?, ?)",
+        [(b[0][1], b[-1][1], b[0][0], b[-1][0], len(b), enc_b)
+         for b, enc_b in zip(hourly_blocks(rows, args.block), blocks)]))
+
+    n = len(rows)
+    print(f"[{name}] {n}개, 블록 {len(blocks)}개")
+    print(f"  압축 크기     : {packed / n:.2f} B/점 (float64 4열 32 B 대비 {32 * n / packed:.1f}배)")
+    print(f"  SQLite 파일   : 행 {raw_rows / 1024:.0f} KB → 블록 {raw_blocks / 1024:.0f} KB "
+          f"({raw_rows / raw_blocks:.1f}배)")
+    print(f"  인코딩/디코딩 : {n / enc:,.0f} / {n / dec:,.0f} 점/초")
+    per_year = packed / n * (365 * 86400 / args.interval)
+    print(f"  1년 예상      : 장치당 {per_year / 2**20:.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="측정값 압축률/속도 측정")
+    parser.add_argument("--hours",    type=float, default=24)
+    parser.add_argument("--interval", type=float, default=1,    help="측정 간격(초)")
+    parser.add_argument("--jitter",   type=float, default=0.02, help="시각 흔들림 표준편차(초)")
+    parser.add_argument("--block",    type=int,   default=3600, help="블록당 최대 측정값 수")
+    args = parser.parse_args()
+
+    for name, resolution in (("DHT11", 1.0), ("DHT22", 0.1)):
+        run(name, make_series(args.hours, args.interval, args.jitter, resolution), args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""수신 서버 부하 테스트 — app.py(Flask-SocketIO) 와 async_app.py(asyncio) 비교
+
+같은 기계에서 두 서버를 차례로 띄우고, 동시 연결 수를 늘려 가며 /api/sensor 로 측정값을 보낸다.
+
+    python3 ingest_bench.py --concurrency 10,100,500 --duration 10
+    python3 ingest_bench.py --server async_app.py     # 한쪽만
+
+측정 항목
+- 초당 처리 요청 수
+- 응답 지연 p50 / p99
+- 실패(연결 거부, 시간 초과, 5xx) 개수
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+# app.py 는 __main__ 의 debug 서버 대신 mqtt_bench.py 처럼 직접 띄움 (리로더 없이)
+SERVER_CODE = {
+    "app.py": ("import app; app.load_history(); app.store.start(); app.broadcaster.start(); "
+               "app.socketio.run(app.app, host='127.0.0.1', port=app.PORT, allow_unsafe_werkzeug=True)"),
+}
+
+def start_server(script, port, store_path):
+    env = dict(os.environ, PORT=str(port), SENSOR_STORE_PATH=store_path)
+    env.pop("SOCKETIO_MESSAGE_QUEUE", None)
+    command = ["-c", SERVER_CODE[script]] if script in SERVER_CODE else [script]
+    proc = subprocess.Popen([sys.executable, *command], cwd=HERE, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_port(port):
+        proc.kill()
+        sys.exit(f"{script} 가 시작되지 않았습니다")
+    return proc
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+# ── 가상 장치 (연결 하나로 계속 보냄) ──────────
+async def run_device(url, device_id, deadline, latencies, counts):
+    body = {"device_id": device_id, "temperature": 24.5, "humidity": 50.0}
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=body) as res:
+                    await res.read()
+                    ok = res.status == 200
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+                counts["ok"] += 1
+            else:
+                counts["failed"] += 1
+                await asyncio.sleep(0.05)
+
+async def run_level(port, concurrency, duration, devices):
+    url = f"http://127.0.0.1:{port}/api/sensor"
+    latencies, counts = [], {"ok": 0, "failed": 0}
+    deadline = time.monotonic() + duration
+    started  = time.monotonic()
+    await asyncio.gather(*(run_device(url, f"bench-{i % devices}", deadline, latencies, counts)
+                           for i in range(concurrency)))
+    elapsed = time.monotonic() - started
+    return counts, latencies, elapsed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="app.py / async_app.py 수신 처리량 비교")
+    parser.add_argument("--server", action="append",
+                        help="비교할 서버 스크립트 (기본: app.py, async_app.py)")
+    parser.add_argument("--concurrency", default="10,100,500", help="동시 연결 수 목록")
+    parser.add_argument("--duration", type=float, default=10, help="단계별 시간(초)")
+    parser.add_argument("--devices",  type=int,   default=20, help="장치 ID 개수")
+    return parser.parse_args()
+
+def main():
+    args   = parse_args()
+    levels = [int(c) for c in args.concurrency.split(",")]
+    for script in args.server or ["app.py", "async_app.py"]:
+        port = free_port()
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = start_server(script, port, os.path.join(tmp, "bench.db"))
+            try:
+                time.sleep(1)
+                print(f"[{script}]")
+                for concurrency in levels:
+                    counts, latencies, elapsed = asyncio.run(
+                        run_level(port, concurrency, args.duration, args.devices))
+                    print(f"  동시 {concurrency:>4} : {counts['ok'] / elapsed:8.0f} 요청/s, "
+                          f"p50 {percentile(latencies, 50) * 1000:7.1f} ms, "
+                          f"p99 {percentile(latencies, 99) * 1000:7.1f} ms, "
+                          f"실패 {counts['failed']}")
+            finally:
+                proc.terminate()
+                proc.wait(5)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+from series_codec import encode_block, decode_block, encodable
+
+# ── 측정값 영구 저장 (write-behind) ────────────
+# /api/sensor 는 큐에 넣기만 하고, 백그라운드 스레드가 SQLite(WAL)에 묶어서 기록
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    device_id   TEXT    NOT NULL,
+    seq         INTEGER NOT NULL,
+    t           REAL    NOT NULL,
+    temperature REAL    NOT NULL,
+    humidity    REAL    NOT NULL,
+    PRIMARY KEY (device_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_readings_t ON readings (t);
+CREATE TABLE IF NOT EXISTS blocks (
+    device_id TEXT    NOT NULL,
+    t_start   REAL    NOT NULL,
+    t_end     REAL    NOT NULL,
+    first_seq INTEGER NOT NULL,
+    last_seq  INTEGER NOT NULL,
+    count     INTEGER NOT NULL,
+    data      BLOB    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blocks_range ON blocks (device_id, t_end, t_start);
+"""
+
+_STOP = object()
+
+# 오래된 readings 행은 장치별·시간(hour)별 압축 블록으로 옮김 (series_codec)
+# 1초 간격 측정값이 행 하나 수십 바이트 → 점 하나 2~3바이트
+COMPACT_CHUNK = 50000   # 한 트랜잭션에서 옮기는 최대 행 수
+
+# 저장 실패(다른 워커의 압축 중 잠김 등) 시 다시 시도 — 0.5초부터 두 배씩, 최대 30초 간격으로 10번
+RETRY_DELAY     = 0.5
+RETRY_MAX_DELAY = 30
+RETRY_LIMIT     = 10
+
+class SensorStore:
+    def __init__(self, path, batch_size=500, flush_interval=1.0,
+                 max_queue=100000, retention_days=30,
+                 compact_after=2 * 86400, block_points=3600):
+        self.path           = path
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.compact_after  = compact_after   # 이 초보다 오래된 행은 블록으로 압축
+        self.block_points   = block_points
+        self.dropped        = 0   # 큐가 가득 찼거나 끝내 저장하지 못해 버린 개수 (stats())
+        self._queue  = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")   # WAL에서는 전원이 나가도 DB가 깨지지 않음
+        conn.executescript(SCHEMA)
+        return conn
+
+    def load_recent(self, seconds, limit):
+        # 장치별 최근 seconds 초, 최대 limit 개 → {device_id: [(seq, t, 온도, 습도), ...]}
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT device_id, seq, t, temperature, humidity FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY device_id ORDER BY seq DESC) AS rn
+                    FROM readings WHERE t >= ?
+                ) WHERE rn <= ? ORDER BY device_id, seq
+            """, (time.time() - seconds, limit)).fetchall()
+        finally:
+            conn.close()
+        result = {}
+        for device_id, *row in rows:
+            result.setdefault(device_id, []).append(tuple(row))
+        return result
+
+    def last_seqs(self):
+        # 장치별 마지막 seq (오래된 것·압축된 블록 포함) → 재시작 후 번호가 1부터 다시 시작하지 않도록
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT device_id, MAX(seq) FROM (
+                    SELECT device_id, MAX(seq) AS seq FROM readings GROUP BY device_id
+                    UNION ALL
+                    SELECT device_id, MAX(last_seq) FROM blocks GROUP BY device_id
+                ) GROUP BY device_id
+            """).fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def query(self, device_id, start, end):
+        # [start, end) 구간 측정값 → [(seq, t, 온도, 습도), ...] 시각 순 (블록 + 최근 행)
+        conn = self._connect()
+        try:
+            blocks = conn.execute("""
+                SELECT data FROM blocks
+                WHERE device_id = ? AND t_end >= ? AND t_start < ?
+            """, (device_id, start, end)).fetchall()
+            rows = conn.execute("""
+                SELECT seq, t, temperature, humidity FROM readings
+                WHERE device_id = ? AND t >= ? AND t < ?
+            """, (device_id, start, end)).fetchall()
+        finally:
+            conn.close()
+        for (data,) in blocks:
+            rows.extend(p for p in decode_block(data) if start <= p[1] < end)
+        rows.sort(key=lambda p: p[1])
+        return rows
+
+    def _compact(self, conn):
+        cutoff = time.time() - self.compact_after
+        devices = [d for (d,) in conn.execute(
+            "SELECT DISTINCT device_id FROM readings WHERE t < ?", (cutoff,))]
+        moved = 0
+        for device_id in devices:
+            while True:
+                with conn:
+                    # 워커 여러 개가 같은 파일을 써도 같은 행을 두 번 압축하지 않도록 읽기부터 쓰기 잠금
+                    conn.execute("BEGIN IMMEDIATE")
+                    rows = conn.execute("""
+                        SELECT seq, t, temperature, humidity FROM readings
+                        WHERE device_id = ? AND t < ? ORDER BY seq LIMIT ?
+                    """, (device_id, cutoff, COMPACT_CHUNK)).fetchall()
+                    if not rows:
+                        break
+                    # 압축할 수 없는 값(범위 밖)은 블록 하나를 통째로 깨뜨리므로 빼고 버림
+                    good = [r for r in rows if encodable(r)]
+                    if len(good) < len(rows):
+                        print(f"기록 압축: {device_id} 의 범위 밖 측정값 {len(rows) - len(good)}개 버림")
+                    for block in self._split(good):
+                        conn.execute("INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                            device_id, min(p[1] for p in block), max(p[1] for p in block),
+                            block[0][0], block[-1][0], len(block), encode_block(block)))
+                    conn.execute("DELETE FROM readings WHERE device_id = ? AND seq <= ? AND t < ?",
+                                 (device_id, rows[-1][0], cutoff))
+                moved += len(rows)
+                if len(rows) < COMPACT_CHUNK:
+                    break
+        return moved
+
+    def _split(self, rows):
+        # 같은 시(hour) 안에서 block_points 개씩
+        if not rows:
+            return
+        block = [rows[0]]
+        for row in rows[1:]:
+            if len(block) >= self.block_points or int(row[1] // 3600) != int(block[0][1] // 3600):
+                yield block
+                block = []
+            block.append(row)
+        yield block
+
+    def put(self, device_id, point):
+        try:
+            self._queue.put_nowait((device_id, point["seq"], point["t"],
+                                    point["temperature"], point["humidity"]))
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=5):
+        if self._thread is not None:
+            self._stopping.set()
+            try:
+                self._queue.put_nowait(_STOP)   # 빈 큐에서 기다리는 get() 을 바로 깨움
+            except queue.Full:
+                pass                            # 가득 차 있으면 어차피 깨어 있음 — 이벤트만 보고 멈춤
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _write(self, conn, batch):
+        # 저장했으면 True, 다시 시도해야 하면(잠김 등) False
+        # 이미 있는 (device_id, seq) 는 덮어쓰지 않음 — 겹치는 행만 빼고 나머지는 저장
+        try:
+            with conn:
+                conn.executemany("INSERT INTO readings VALUES (?, ?, ?, ?, ?)", batch)
+            return True
+        except sqlite3.IntegrityError:
+            pass
+        except sqlite3.Error as e:
+            print("기록 저장 오류 (다시 시도):", e)
+            return False
+        duplicates = 0
+        try:
+            with conn:
+                for row in batch:
+                    try:
+                        conn.execute("INSERT INTO readings VALUES (?, ?, ?, ?, ?)", row)
+                    except sqlite3.IntegrityError:
+                        duplicates += 1
+        except sqlite3.Error as e:
+            print("기록 저장 오류 (다시 시도):", e)
+            return False
+        print(f"기록 저장: 이미 있는 seq {duplicates}개는 건너뜀")
+        return True
+
+    def _retry(self, conn, batch):
+        # 저장에 실패한 묶음은 버리지 않고 간격을 늘려 가며 다시 시도
+        # (그동안 새 측정값은 큐에 쌓이고, 큐가 가득 차면 put() 에서 dropped 로 셈)
+        delay = RETRY_DELAY
+        for _ in range(RETRY_LIMIT):
+            if self._write(conn, batch):
+                return True
+            if self._stopping.wait(delay):
+                break
+            delay = min(delay * 2, RETRY_MAX_DELAY)
+        return self._write(conn, batch)
+
+    def _save(self, conn, batch):
+        try:
+            saved = self._write(conn, batch) or self._retry(conn, batch)
+        except Exception as e:   # sqlite 밖의 오류로 저장 스레드가 죽지 않도록
+            print("기록 저장 오류:", e)
+            saved = False
+        if not saved:
+            self.dropped += len(batch)
+            print(f"기록 저장: {len(batch)}개를 끝내 저장하지 못해 버림")
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_max":   self._queue.maxsize,
+            "dropped":     self.dropped,
+        }
+
+    def _run(self):
+        conn = self._connect()
+        next_purge  = 0
+        next_report = 0
+        reported    = 0
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if batch:
+                self._save(conn, batch)
+            if self.dropped != reported and time.monotonic() >= next_report:
+                next_report = time.monotonic() + 60
+                reported = self.dropped
+                print(f"기록 저장: 지금까지 버린 측정값 {reported}개 (큐 가득 참 또는 저장 실패)")
+            if stopping or self._stopping.is_set():
+                break
+            if time.monotonic() >= next_purge:
+                next_purge = time.monotonic() + 3600
+                try:
+                    self._compact(conn)
+                    cutoff = time.time() - self.retention_days * 86400
+                    with conn:
+                        conn.execute("DELETE FROM readings WHERE t < ?", (cutoff,))
+                        conn.execute("DELETE FROM blocks WHERE t_end < ?", (cutoff,))
+                except Exception as e:
+                    print("기록 정리 오류:", e)
+        self._drain(conn)
+        conn.close()
+
+    def _drain(self, conn):
+        # 멈출 때 큐에 남아 있는 측정값도 저장
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._save(conn, batch)
+                batch = []
+        if batch:
+            self._save(conn, batch)
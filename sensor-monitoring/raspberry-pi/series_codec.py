@@ -0,0 +1,164 @@
+import math
+import struct
+
+# ── 시계열 압축 (Gorilla 방식) ────────────────
+# 측정값 묶음(블록) 하나를 비트 단위로 압축
+# - seq : 앞 번호와의 차이 - 1 (보통 0 → 1비트)
+# - 시각: ms 단위 delta-of-delta (일정한 간격이면 0 → 1비트)
+# - 값  : 고정소수점(scale 배 정수)으로 바꾼 뒤 앞 값과의 차이 (안 변하면 1비트)
+#         DHT11처럼 0.1 단위로 조금씩 바뀌는 값은 float XOR 보다 차이가 훨씬 짧음
+# 차이는 zigzag 로 부호를 없앤 뒤 크기에 맞는 칸(bucket)에 넣는다
+#   '0'                 → 0
+#   '10'   + 작은 칸
+#   '110'  + 중간 칸
+#   '1110' + 큰 칸
+#   '1111' + 64비트
+HEADER  = struct.Struct("<BHHB")   # 버전, 개수, scale, 값 열 개수
+VERSION = 1
+
+TIME_BUCKETS  = (7, 9, 12)    # delta-of-delta(ms)
+VALUE_BUCKETS = (4, 8, 16)    # 고정소수점 차이
+SEQ_BUCKETS   = (4, 8, 16)
+
+# 첫 값은 64비트, 차이/delta-of-delta 도 64비트 안에 들어가야 하므로 seq/시각(ms)/고정소수점 값을 ±2^61 로 제한
+LIMIT = 1 << 61
+
+def _fixed(value, factor):
+    # float → 정수(factor 배), 범위를 벗어나면 ValueError (블록 전체가 깨지지 않도록 미리 막음)
+    if not math.isfinite(value):
+        raise ValueError(f"압축할 수 없는 값: {value}")
+    n = round(value * factor)
+    if not -LIMIT <= n < LIMIT:
+        raise ValueError(f"압축할 수 있는 범위를 벗어난 값: {value}")
+    return n
+
+def encodable(point, scale=100):
+    # (seq, t, 값...) 이 encode_block 에 들어갈 수 있는지
+    seq, t, *values = point
+    try:
+        _fixed(seq, 1)
+        _fixed(t, 1000)
+        for v in values:
+            _fixed(v, scale)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+def _zigzag(n):
+    return (n << 1) ^ (n >> 63)
+
+def _unzigzag(z):
+    return (z >> 1) ^ -(z & 1)
+
+
+class BitWriter:
+    def __init__(self):
+        self._out   = bytearray()
+        self._acc   = 0
+        self._nbits = 0
+
+    def write(self, value, nbits):
+        self._acc = (self._acc << nbits) | value
+        self._nbits += nbits
+        while self._nbits >= 8:
+            self._nbits -= 8
+            self._out.append((self._acc >> self._nbits) & 0xFF)
+        self._acc &= (1 << self._nbits) - 1
+
+    def getvalue(self):
+        if self._nbits:
+            return bytes(self._out) + bytes([(self._acc << (8 - self._nbits)) & 0xFF])
+        return bytes(self._out)
+
+
+class BitReader:
+    def __init__(self, data, offset=0):
+        self._data  = data
+        self._pos   = offset
+        self._acc   = 0
+        self._nbits = 0
+
+    def read(self, nbits):
+        while self._nbits < nbits:
+            self._acc = (self._acc << 8) | self._data[self._pos]
+            self._pos += 1
+            self._nbits += 8
+        self._nbits -= nbits
+        value = self._acc >> self._nbits
+        self._acc &= (1 << self._nbits) - 1
+        return value
+
+    def bit(self):
+        return self.read(1)
+
+
+def _write_delta(w, delta, buckets):
+    if delta == 0:
+        w.write(0, 1)
+        return
+    z = _zigzag(delta)
+    for i, size in enumerate(buckets):
+        if z < (1 << size):
+            # i+1 개의 1 다음 0 (예: i=0 → '10')
+            w.write(((1 << (i + 1)) - 1) << 1, i + 2)
+            w.write(z, size)
+            return
+    w.write(0b1111, 4)
+    w.write(z, 64)
+
+def _read_delta(r, buckets):
+    ones = 0
+    while ones < 4 and r.bit():
+        ones += 1
+    if ones == 0:
+        return 0
+    return _unzigzag(r.read(buckets[ones - 1] if ones < 4 else 64))
+
+
+def encode_block(points, scale=100):
+    # points: [(seq, t, 값1, 값2, ...), ...] seq 순
+    # t 는 epoch 초(float) → ms 로 반올림, 값은 1/scale 단위로 반올림해서 저장
+    if not points or len(points) > 0xFFFF:
+        raise ValueError("블록에는 1~65535개의 측정값만 넣을 수 있습니다")
+    ncols = len(points[0]) - 2
+    w = BitWriter()
+    seq, t, *values = points[0]
+    seq    = _fixed(seq, 1)
+    t      = _fixed(t, 1000)
+    values = [_fixed(v, scale) for v in values]
+    w.write(_zigzag(seq), 64)
+    w.write(_zigzag(t), 64)
+    for v in values:
+        w.write(_zigzag(v), 64)
+    prev_seq, prev_t, prev_delta, prev_values = seq, t, 0, values
+    for seq, t, *values in points[1:]:
+        seq = _fixed(seq, 1)
+        t   = _fixed(t, 1000)
+        _write_delta(w, seq - prev_seq - 1, SEQ_BUCKETS)
+        delta = t - prev_t
+        _write_delta(w, delta - prev_delta, TIME_BUCKETS)
+        for i, v in enumerate(values):
+            v = _fixed(v, scale)
+            _write_delta(w, v - prev_values[i], VALUE_BUCKETS)
+            prev_values[i] = v
+        prev_seq, prev_t, prev_delta = seq, t, delta
+    return HEADER.pack(VERSION, len(points), scale, ncols) + w.getvalue()
+
+def decode_block(data):
+    version, count, scale, ncols = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"지원하지 않는 블록 버전: {version}")
+    r = BitReader(data, HEADER.size)
+    seq    = _unzigzag(r.read(64))
+    t      = _unzigzag(r.read(64))
+    values = [_unzigzag(r.read(64)) for _ in range(ncols)]
+    out   = [(seq, t / 1000, *(v / scale for v in values))]
+    delta = 0
+    for _ in range(count - 1):
+        seq   += _read_delta(r, SEQ_BUCKETS) + 1
+        delta += _read_delta(r, TIME_BUCKETS)
+        t     += delta
+        for i in range(ncols):
+            values[i] += _read_delta(r, VALUE_BUCKETS)
+        out.append((seq, t / 1000, *(v / scale for v in values)))
+    return out
@@ -0,0 +1,160 @@
+import os
+import shutil
+from datetime import datetime, timedelta
+
+import numpy as np
+
+COLUMNS = {
+    "t":           np.float64,   # epoch 초
+    "temperature": np.float32,
+    "humidity":    np.float32,
+}
+
+# ── 과거 데이터 열(column) 저장소 ─────────────
+# 하루치 sensor_data 를 열마다 .npy 파일 하나로 저장
+#   archive/2026-10-19/t.npy, temperature.npy, humidity.npy
+# 조회할 때는 np.load(mmap_mode="r") 로 열어서 필요한 부분만 페이지 캐시로 읽음
+# (DB 테이블을 훑지 않고 NumPy 벡터 연산으로 시간대별/일별 통계, 백분위, 상관계수 계산)
+class SensorArchive:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _day_dir(self, day):
+        return os.path.join(self.path, day.isoformat())
+
+    def days(self):
+        result = []
+        for name in sorted(os.listdir(self.path)):
+            if not os.path.exists(os.path.join(self.path, name, "t.npy")):
+                continue   # 쓰는 도중이거나 깨진 폴더
+            try:
+                result.append(datetime.strptime(name, "%Y-%m-%d").date())
+            except ValueError:
+                pass
+        return result
+
+    def has_day(self, day):
+        return os.path.exists(os.path.join(self._day_dir(day), "t.npy"))
+
+    def write_day(self, day, rows):
+        # rows: [(시각 datetime, 온도, 습도), ...] 시각 순
+        # 임시 폴더에 다 쓴 뒤 이름을 바꿔서, 중간에 죽어도 반쪽짜리 하루가 보이지 않게 함
+        t    = np.array([r[0].timestamp() for r in rows], dtype=COLUMNS["t"])
+        temp = np.array([r[1] for r in rows], dtype=COLUMNS["temperature"])
+        hum  = np.array([r[2] for r in rows], dtype=COLUMNS["humidity"])
+        order = np.argsort(t, kind="stable")
+        final = self._day_dir(day)
+        tmp   = final + ".tmp"
+        os.makedirs(tmp, exist_ok=True)
+        for name, values in (("temperature", temp), ("humidity", hum), ("t", t)):
+            np.save(os.path.join(tmp, name + ".npy"), values[order])
+        if os.path.exists(final):
+            shutil.rmtree(final)   # 같은 날을 다시 만드는 경우
+        os.replace(tmp, final)
+        return len(rows)
+
+    def _open(self, day):
+        folder = self._day_dir(day)
+        return {name: np.load(os.path.join(folder, name + ".npy"), mmap_mode="r")
+                for name in COLUMNS}
+
+    def segments(self, start, end):
+        # [start, end) 에 걸치는 날짜별 조각 → [(날짜, {열: 배열}), ...]
+        lo, hi = start.timestamp(), end.timestamp()
+        for day in self.days():
+            if day < start.date() or day > end.date():
+                continue
+            cols = self._open(day)
+            i, j = np.searchsorted(cols["t"], [lo, hi])
+            if i < j:
+                yield day, {name: col[i:j] for name, col in cols.items()}
+
+    def load(self, start, end):
+        parts = [cols for _, cols in self.segments(start, end)]
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+    # ── 분석 ─────────────────────────────────
+    def hourly_profile(self, start, end):
+        # 시(0~23)별 온도/습도 평균·최소·최대
+        count = np.zeros(24)
+        sums  = {c: np.zeros(24) for c in ("temperature", "humidity")}
+        mins  = {c: np.full(24, np.inf) for c in sums}
+        maxs  = {c: np.full(24, -np.inf) for c in sums}
+        for day, cols in self.segments(start, end):
+            midnight = datetime.combine(day, datetime.min.time()).timestamp()
+            hour = np.clip(((cols["t"] - midnight) // 3600).astype(np.intp), 0, 23)
+            count += np.bincount(hour, minlength=24)
+            for c in sums:
+                values = cols[c].astype(np.float64)
+                sums[c] += np.bincount(hour, weights=values, minlength=24)
+                np.minimum.at(mins[c], hour, values)
+                np.maximum.at(maxs[c], hour, values)
+        result = []
+        for h in range(24):
+            if not count[h]:
+                continue
+            row = {"hour": h, "count": int(count[h])}
+            for c, key in (("temperature", "temp"), ("humidity", "hum")):
+                row[f"{key}_avg"] = float(sums[c][h] / count[h])
+                row[f"{key}_min"] = float(mins[c][h])
+                row[f"{key}_max"] = float(maxs[c][h])
+            result.append(row)
+        return result
+
+    def daily(self, start, end):
+        result = []
+        for day, cols in self.segments(start, end):
+            row = {"day": day.isoformat(), "count": int(len(cols["t"]))}
+            for c, key in (("temperature", "temp"), ("humidity", "hum")):
+                values = cols[c]
+                row[f"{key}_avg"] = float(values.mean(dtype=np.float64))
+                row[f"{key}_min"] = float(values.min())
+                row[f"{key}_max"] = float(values.max())
+            result.append(row)
+        return result
+
+    def percentiles(self, start, end, qs=(5, 25, 50, 75, 95)):
+        return _percentiles(self.load(start, end), qs)
+
+    def correlation(self, start, end):
+        return _correlation(self.load(start, end))
+
+    def summary(self, start, end):
+        data = self.load(start, end)   # 백분위/상관계수는 같은 배열로 계산
+        return {
+            "from":        start.isoformat(),
+            "to":          end.isoformat(),
+            "count":       int(len(data["t"])),
+            "hourly":      self.hourly_profile(start, end),
+            "daily":       self.daily(start, end),
+            "percentiles": _percentiles(data),
+            "correlation": _correlation(data),
+        }
+
+
+def _percentiles(data, qs=(5, 25, 50, 75, 95)):
+    if not len(data["t"]):
+        return None
+    return {
+        c: dict(zip((f"p{q}" for q in qs),
+                    (float(v) for v in np.percentile(data[c], qs))))
+        for c in ("temperature", "humidity")
+    }
+
+def _correlation(data):
+    # 온도-습도 피어슨 상관계수 (값이 2개 미만이거나 한쪽이 일정하면 None)
+    if len(data["t"]) < 2:
+        return None
+    temp = data["temperature"].astype(np.float64)
+    hum  = data["humidity"].astype(np.float64)
+    if temp.std() == 0 or hum.std() == 0:
+        return None
+    return float(np.corrcoef(temp, hum)[0, 1])
+
+def day_range(day):
+    # 날짜 하나의 [자정, 다음 날 자정)
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
@@ -0,0 +1,2 @@
+# sensor-monitoring/raspberry-pi 와 mqtt-dashboard 가 함께 쓰는 모듈
+# (각 앱의 app.py 가 저장소 최상위를 sys.path 에 넣고 가져옴)
@@ -0,0 +1,118 @@
+from array import array
+import math
+
+try:
+    import numpy as np   # 있으면 통계를 벡터 연산으로 계산
+except ImportError:
+    np = None
+
+VALUE_COLUMNS = ("temperature", "humidity")
+
+# ── 센서 기록용 고정 크기 링 버퍼 ──────────────
+# 측정값 하나를 dict로 들고 있지 않고 시각/온도/습도를 각각 array('d')에 저장
+# (측정값 하나에 24바이트 — 1초 간격 24시간이면 장치당 약 2MB)
+# 배열은 처음부터 capacity 만큼 잡지 않고 들어온 만큼 늘려 가다가, 가득 차면 앞에서부터 덮어씀
+# columns 로 값 열을 바꿀 수 있음 (예: 토픽 하나에 값 하나면 ("value",))
+class SensorRing:
+    def __init__(self, capacity, columns=VALUE_COLUMNS):
+        self.capacity = capacity
+        self.columns  = tuple(columns)
+        self._cols    = {name: array('d') for name in ("t",) + self.columns}
+        self._head    = 0   # 다음에 쓸 위치
+        self._len     = 0
+        self.last_seq = 0   # 마지막 측정값 번호 (번호는 1씩 증가하므로 따로 저장하지 않음)
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def first_seq(self):
+        return self.last_seq - self._len + 1
+
+    def append(self, t, *values):
+        i = self._head
+        if i == len(self._cols["t"]):   # 아직 가득 차지 않음 — 뒤에 붙임
+            self._cols["t"].append(t)
+            for name, value in zip(self.columns, values):
+                self._cols[name].append(value)
+        else:
+            self._cols["t"][i] = t
+            for name, value in zip(self.columns, values):
+                self._cols[name][i] = value
+        self._head = (i + 1) % self.capacity
+        self._len  = min(self._len + 1, self.capacity)
+        self.last_seq += 1
+        return self.last_seq
+
+    def load(self, rows):
+        # 저장해 둔 (seq, 시각, 값...) 을 순서대로 다시 채우고 마지막 seq를 이어받음
+        for seq, t, *values in rows:
+            self.append(t, *values)
+            self.last_seq = seq
+
+    def _segments(self, n):
+        # 최근 n개가 버퍼에서 차지하는 연속 구간들 (오래된 것부터, 최대 2개)
+        n     = min(n, self._len)
+        start = (self._head - n) % self.capacity
+        if n == 0:
+            return []
+        if start + n <= self.capacity:
+            return [(start, start + n)]
+        return [(start, self.capacity), (0, self._head)]
+
+    def view(self, name, n=None):
+        # 복사 없이 memoryview 조각으로 반환
+        # 단, 아직 늘어나는 중인 배열은 memoryview 가 살아 있는 동안 append 가 BufferError 를 내므로 복사본(array)으로
+        col  = self._cols[name]
+        segs = self._segments(self._len if n is None else n)
+        if len(col) < self.capacity:
+            return [col[lo:hi] for lo, hi in segs]
+        buf = memoryview(col)
+        return [buf[lo:hi] for lo, hi in segs]
+
+    def points(self, n=None):
+        n   = self._len if n is None else min(n, self._len)
+        seq = self.last_seq - n + 1
+        names = ("t",) + self.columns
+        out = []
+        for lo, hi in self._segments(n):
+            for row in zip(*(self._cols[name][lo:hi] for name in names)):
+                point = {"seq": seq}
+                point.update(zip(names, row))
+                out.append(point)
+                seq += 1
+        return out
+
+    def last(self):
+        if not self._len:
+            return None
+        return self.points(1)[0]
+
+    def stats(self, n=None):
+        # 최근 n개(기본 전체)의 평균/최소/최대/표준편차
+        result = {"count": min(self._len, self._len if n is None else n)}
+        for name in self.columns:
+            parts = self.view(name, n)
+            count = sum(len(p) for p in parts)
+            if not count:
+                result[name] = None
+                continue
+            if np is not None:
+                arrs  = [np.frombuffer(p, dtype=np.float64) for p in parts]
+                total = sum(float(a.sum()) for a in arrs)
+                sq    = sum(float(np.dot(a, a)) for a in arrs)
+                lo    = min(float(a.min()) for a in arrs)
+                hi    = max(float(a.max()) for a in arrs)
+            else:
+                total = math.fsum(math.fsum(p) for p in parts)
+                sq    = math.fsum(math.fsum(v * v for v in p) for p in parts)
+                lo    = min(min(p) for p in parts)
+                hi    = max(max(p) for p in parts)
+            mean = total / count
+            result[name] = {
+                "mean":   mean,
+                "min":    lo,
+                "max":    hi,
+                "stddev": math.sqrt(max(sq / count - mean * mean, 0.0)),
+            }
+        return result
@@ -0,0 +1,140 @@
+import json
+import math
+
+import redis
+
+from .ring_buffer import VALUE_COLUMNS
+
+# ── 여러 프로세스가 함께 쓰는 최근 기록 (Redis) ──
+# 워커 프로세스를 여러 개 띄우면 각자 메모리의 SensorRing 은 서로 다른 내용을 갖게 되므로
+# seq 번호와 최근 capacity 개 기록을 Redis 에 둔다
+#   <prefix>:seq:<key>   마지막 seq (INCRBY 로 프로세스 사이에서도 겹치지 않게)
+#   <prefix>:hist:<key>  "seq|[t, 값...]" 목록 (오래된 것부터, capacity 개로 자름)
+#   <prefix>:keys        기록이 있는 key 목록
+# SensorRing 과 같은 모양의 점/통계를 돌려줘서 호출하는 쪽은 어느 쪽인지 신경 쓰지 않아도 됨
+_APPEND = """
+local n    = #ARGV - 2
+local last = redis.call('INCRBY', KEYS[1], n)
+for i = 3, #ARGV do
+    redis.call('RPUSH', KEYS[2], (last - n + i - 2) .. '|' .. ARGV[i])
+end
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[1]), -1)
+redis.call('SADD', KEYS[3], ARGV[2])
+return last
+"""
+
+# 저장소(SQLite 등)에서 복원한 기록이 Redis 보다 앞서 있을 때만 덮어씀 — 여러 워커가 동시에 불러도 한 번만 적용
+_SEED = """
+local last = tonumber(ARGV[2])
+if tonumber(redis.call('GET', KEYS[1]) or '0') >= last then
+    return 0
+end
+redis.call('DEL', KEYS[2])
+for i = 4, #ARGV do
+    redis.call('RPUSH', KEYS[2], ARGV[i])
+end
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[1]), -1)
+redis.call('SET', KEYS[1], last)
+redis.call('SADD', KEYS[3], ARGV[3])
+return 1
+"""
+
+class SharedHistory:
+    def __init__(self, url, prefix, capacity, columns=VALUE_COLUMNS):
+        self.capacity = capacity
+        self.columns  = tuple(columns)
+        self.prefix   = prefix
+        self._redis   = redis.Redis.from_url(url)
+        self._append  = self._redis.register_script(_APPEND)
+        self._seed    = self._redis.register_script(_SEED)
+
+    def _keys(self, key):
+        return (f"{self.prefix}:seq:{key}", f"{self.prefix}:hist:{key}", f"{self.prefix}:keys")
+
+    def _decode(self, entry):
+        seq, _, body = entry.decode().partition("|")
+        t, *values = json.loads(body)
+        point = {"seq": int(seq), "t": t}
+        point.update(zip(self.columns, values))
+        return point
+
+    def append_many(self, key, rows):
+        # rows: [(시각, 값...), ...] → seq 가 붙은 점 목록 (한 번의 왕복으로 번호를 한꺼번에 받음)
+        if not rows:
+            return []
+        last  = self._append(keys=self._keys(key),
+                             args=[self.capacity, key] + [json.dumps(list(r)) for r in rows])
+        first = last - len(rows) + 1
+        points = []
+        for seq, (t, *values) in enumerate(rows, first):
+            point = {"seq": seq, "t": t}
+            point.update(zip(self.columns, values))
+            points.append(point)
+        return points
+
+    def append(self, key, t, *values):
+        return self.append_many(key, [(t,) + values])[0]
+
+    def seed(self, key, rows, last_seq=None):
+        # rows: [(seq, 시각, 값...), ...] seq 순, last_seq: 기록이 없어도 이어받을 마지막 번호
+        rows = list(rows)[-self.capacity:]
+        if last_seq is None:
+            if not rows:
+                return False
+            last_seq = rows[-1][0]
+        entries = [f"{seq}|{json.dumps([t] + list(values))}" for seq, t, *values in rows]
+        return bool(self._seed(keys=self._keys(key),
+                               args=[self.capacity, last_seq, key] + entries))
+
+    def has_key(self, key):
+        return bool(self._redis.sismember(f"{self.prefix}:keys", key))
+
+    def key_count(self):
+        return self._redis.scard(f"{self.prefix}:keys")
+
+    def keys(self):
+        return sorted(k.decode() for k in self._redis.smembers(f"{self.prefix}:keys"))
+
+    def points(self, key, n=None):
+        n = self.capacity if n is None else min(n, self.capacity)
+        if n <= 0:
+            return []
+        return [self._decode(e) for e in self._redis.lrange(self._keys(key)[1], -n, -1)]
+
+    def last(self, key):
+        points = self.points(key, 1)
+        return points[0] if points else None
+
+    def snapshot(self, key, since, size):
+        # 브라우저가 마지막으로 받은 seq 뒤가 남아 있고 size 개 이내면 그 뒤만, 아니면 최근 size 개를 reset으로
+        seq_key, hist_key, _ = self._keys(key)
+        with self._redis.pipeline() as pipe:   # MULTI — 번호와 목록을 같은 시점으로 읽음
+            pipe.get(seq_key)
+            pipe.llen(hist_key)
+            pipe.lrange(hist_key, -size, -1)
+            last, length, entries = pipe.execute()
+        last   = int(last or 0)
+        points = [self._decode(e) for e in entries]
+        first  = last - length + 1
+        if since is not None and length and first - 1 <= since <= last and last - since <= size:
+            return {"seq": last, "reset": False, "history": [p for p in points if p["seq"] > since]}
+        return {"seq": last, "reset": True, "history": points}
+
+    def stats(self, key, n=None):
+        # SensorRing.stats 와 같은 모양 (Redis 에 남아 있는 capacity 개 안에서)
+        points = self.points(key, n)
+        result = {"count": len(points)}
+        for name in self.columns:
+            values = [p[name] for p in points]
+            if not values:
+                result[name] = None
+                continue
+            mean = math.fsum(values) / len(values)
+            sq   = math.fsum(v * v for v in values)
+            result[name] = {
+                "mean":   mean,
+                "min":    min(values),
+                "max":    max(values),
+                "stddev": math.sqrt(max(sq / len(values) - mean * mean, 0.0)),
+            }
+        return result